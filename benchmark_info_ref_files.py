@@ -0,0 +1,314 @@
+"""
+Benchmarks the info_ref_files package against synthetic reference file collections.
+
+For every corpus size a directory of FITS, JSON and ASDF reference files is
+generated for each instrument handled by change_style, together with matching
+fake valid_params, required_keywords and required_or csv files. Each corpus is
+then checked in a fresh process, and the files/sec, peak RSS and time spent in
+every stage of the checks are reported.
+
+The FITS files carry a realistic primary header and a large SCI extension.
+Data is written sparsely, so even the 100k file corpus costs little disk.
+"""
+import os
+import io
+import csv
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import resource
+import concurrent.futures
+
+import numpy as np
+import asdf
+from astropy.io import fits
+
+import info_ref_files
+
+DEFAULT_SIZES = [100, 1000, 10000, 100000]
+REFTYPES = ["FLAT", "DARK", "GAIN", "READNOISE"]
+STAGES = ["scan", "read", "usability", "required_ors", "required_keys", "valid_params"]
+SPARSE_CHUNK_SIZE = 65536
+
+# Valid values written to the fake valid_params csv files, per keyword
+VALID_VALUES = {
+    "DETECTOR": ["NRCA1", "NRCA2", "NRCB1", "MIRIMAGE", "MIRIFULONG", "NIS", "GUIDER1", "GUIDER2", "NRS1", "NRS2"],
+    "FILTER": ["F070W", "F090W", "F115W", "F150W", "F200W", "CLEAR", "N/A", "ANY"],
+    "PUPIL": ["CLEAR", "GRISMR", "N/A", "ANY"],
+    "READPATT": ["RAPID", "BRIGHT1", "BRIGHT2", "SHALLOW2", "DEEP8", "ANY"],
+    "SUBARRAY": ["FULL", "SUB64P", "SUB160", "SUB400P", "GENERIC"],
+    "EXP_TYPE": ["NRC_IMAGE", "MIR_IMAGE", "NIS_IMAGE", "FGS_IMAGE", "NRS_MSASPEC", "N/A", "ANY"],
+    "SUBSTRT1": ["1", "5", "1025"],
+    "SUBSTRT2": ["1", "5", "1025"],
+    "SUBSIZE1": ["64", "160", "400", "2048"],
+    "SUBSIZE2": ["64", "160", "400", "2048"],
+    "FASTAXIS": ["-2", "-1", "1", "2"],
+    "SLOWAXIS": ["-2", "-1", "1", "2"],
+    "USEAFTER": [],
+    "PEDIGREE": [],
+    "AUTHOR": [],
+    "DESCRIP": [],
+    "HISTORY": [],
+}
+REQUIRED_KEYWORDS = ["TELESCOP", "INSTRUME", "DETECTOR", "FILTER", "READPATT", "SUBARRAY",
+    "REFTYPE", "DESCRIP", "AUTHOR", "PEDIGREE", "HISTORY"]
+REQUIRED_OR = ["FILTER", "READPATT", "EXP_TYPE=NRC_IMAGE=PUPIL=CLEAR|N/A", "SUBARRAY"]
+
+################################################################################
+# Corpus generation
+################################################################################
+
+def write_rules(rules_dir):
+    """
+    Writes fake valid_params, required_keywords and required_or csv files
+    for every instrument
+    """
+    for sub_dir in ("valid_params", "required_keywords"):
+        os.makedirs(os.path.join(rules_dir, sub_dir), exist_ok=True)
+    or_rows = []
+    for instrument in info_ref_files.INSTRUMENTS:
+        path = os.path.join(rules_dir, "valid_params", instrument + "_valid_params.csv")
+        with open(path, 'w', newline='') as csvfile:
+            keywriter = csv.writer(csvfile, delimiter=' ', quotechar='|', quoting=csv.QUOTE_MINIMAL)
+            keywriter.writerow(["INSTRUME", instrument.upper(), instrument])
+            for keyword, values in VALID_VALUES.items():
+                keywriter.writerow([keyword] + values)
+        path = os.path.join(rules_dir, "required_keywords", instrument + "_required_keywords.csv")
+        with open(path, 'w', newline='') as csvfile:
+            keywriter = csv.writer(csvfile, delimiter=' ', quotechar='|', quoting=csv.QUOTE_MINIMAL)
+            for reftype in REFTYPES:
+                keywriter.writerow(["jwst_{}_{}".format(instrument.lower(), reftype.lower())] + REQUIRED_KEYWORDS)
+        for reftype in REFTYPES:
+            or_rows.append(["{}_{}".format(instrument.lower(), reftype.lower())] + REQUIRED_OR)
+    with open(os.path.join(rules_dir, "required_or.csv"), 'w', newline='') as csvfile:
+        keywriter = csv.writer(csvfile, delimiter=' ', quotechar='|', quoting=csv.QUOTE_MINIMAL)
+        keywriter.writerows(or_rows)
+
+def make_metadata(instrument, reftype, rng, invalid):
+    """
+    Returns FITS style keyword -> value metadata for one reference file.
+    Invalid files get a bad value and lose a required keyword
+    """
+    metadata = {
+        "TELESCOP": "JWST",
+        "INSTRUME": instrument.upper(),
+        "DETECTOR": rng.choice(VALID_VALUES["DETECTOR"]),
+        "FILTER": rng.choice(VALID_VALUES["FILTER"]),
+        "PUPIL": "CLEAR",
+        "READPATT": "RAPID|BRIGHT1",
+        "SUBARRAY": "FULL",
+        "SUBSTRT1": 1,
+        "SUBSTRT2": 1,
+        "SUBSIZE1": 2048,
+        "SUBSIZE2": 2048,
+        "FASTAXIS": -1,
+        "SLOWAXIS": 2,
+        "EXP_TYPE": "NRC_IMAGE",
+        "REFTYPE": reftype,
+        "DESCRIP": "Synthetic {} reference file".format(reftype.lower()),
+        "AUTHOR": "benchmark_info_ref_files",
+        "PEDIGREE": rng.choice(["GROUND", "DUMMY", "INFLIGHT 2016-01-01 2016-02-01"]),
+        "USEAFTER": "2015-01-01T00:00:00",
+    }
+    if invalid:
+        metadata["FILTER"] = "F999X"
+        metadata["USEAFTER"] = "2015-13-45T00:00:00"
+        del metadata["SUBARRAY"]
+    return metadata
+
+def make_fits_header_bytes(metadata, data_shape):
+    """
+    Returns the primary and SCI extension header blocks of a FITS file, and
+    the padded size of its data
+    """
+    primary = fits.Header()
+    primary["SIMPLE"] = True
+    primary["BITPIX"] = 8
+    primary["NAXIS"] = 0
+    primary["EXTEND"] = True
+    primary["DATE"] = "2016-01-01T00:00:00"
+    primary["FILENAME"] = "synthetic.fits"
+    for keyword, value in metadata.items():
+        primary[keyword] = value
+    for i in range(10):
+        primary.add_history("Synthetic history entry {} for benchmarking".format(i))
+    extension = fits.Header()
+    extension["XTENSION"] = "IMAGE"
+    extension["BITPIX"] = -32
+    extension["NAXIS"] = 2
+    extension["NAXIS1"] = data_shape[1]
+    extension["NAXIS2"] = data_shape[0]
+    extension["PCOUNT"] = 0
+    extension["GCOUNT"] = 1
+    extension["EXTNAME"] = "SCI"
+    data_size = data_shape[0] * data_shape[1] * 4
+    block_size = info_ref_files.FITS_BLOCK_SIZE
+    padded_size = -(-data_size // block_size) * block_size
+    return ((primary.tostring() + extension.tostring()).encode('ascii'), padded_size)
+
+def make_json_metadata(metadata):
+    """
+    Returns the JSON style metadata for one reference file
+    """
+    return {
+        "title": metadata["DESCRIP"],
+        "reftype": metadata["REFTYPE"].lower(),
+        "pedigree": metadata["PEDIGREE"],
+        "author": metadata["AUTHOR"],
+        "telescope": metadata["TELESCOP"],
+        "exp_type": metadata["EXP_TYPE"],
+        "instrument": metadata["INSTRUME"],
+        "useafter": metadata["USEAFTER"],
+        "description": metadata["DESCRIP"],
+    }
+
+def make_asdf_bytes(metadata, data_shape):
+    """
+    Returns the bytes of an ASDF file holding the metadata and a data array
+    """
+    tree = make_json_metadata(metadata)
+    tree["history"] = {"entries": [{"description": "Synthetic history entry"}]}
+    tree["data"] = np.zeros(data_shape, dtype=np.float32)
+    buffer = io.BytesIO()
+    asdf.AsdfFile(tree).write_to(buffer)
+    return buffer.getvalue()
+
+def write_sparse(path, content, size=None):
+    """
+    Writes content to path, seeking over all zero chunks so they take no
+    disk space, and extends the file to size if given
+    """
+    with open(path, 'wb') as sparse_file:
+        for offset in range(0, len(content), SPARSE_CHUNK_SIZE):
+            chunk = content[offset:offset+SPARSE_CHUNK_SIZE]
+            if chunk.count(0) == len(chunk):
+                sparse_file.seek(len(chunk), os.SEEK_CUR)
+            else:
+                sparse_file.write(chunk)
+        sparse_file.truncate(max(len(content), size or 0))
+
+def generate_corpus(corpus_dir, size, data_shape, asdf_shape, invalid_fraction, seed):
+    """
+    Writes size reference files to corpus_dir. 70% are FITS, 20% JSON and
+    10% ASDF, spread over every instrument and reftype
+    """
+    os.makedirs(corpus_dir, exist_ok=True)
+    rng = random.Random(seed)
+    fits_templates = {}
+    asdf_templates = {}
+    for i in range(size):
+        instrument = info_ref_files.INSTRUMENTS[i % len(info_ref_files.INSTRUMENTS)]
+        reftype = REFTYPES[(i // len(info_ref_files.INSTRUMENTS)) % len(REFTYPES)]
+        invalid = rng.random() < invalid_fraction
+        template_key = (instrument, reftype, invalid)
+        name = "jwst_{}_{}_{:06d}".format(instrument.lower(), reftype.lower(), i)
+        kind = i % 10
+        if kind < 7:
+            if template_key not in fits_templates:
+                fits_templates[template_key] = make_fits_header_bytes(
+                    make_metadata(instrument, reftype, rng, invalid), data_shape)
+            (header_bytes, data_size) = fits_templates[template_key]
+            write_sparse(os.path.join(corpus_dir, name + ".fits"), header_bytes,
+                len(header_bytes) + data_size)
+        elif kind < 9:
+            metadata = make_json_metadata(make_metadata(instrument, reftype, rng, invalid))
+            metadata["HISTORY"] = "Synthetic history entry"
+            metadata["msaoper"] = []
+            with open(os.path.join(corpus_dir, name + ".json"), 'w') as json_file:
+                json.dump(metadata, json_file)
+        else:
+            if template_key not in asdf_templates:
+                asdf_templates[template_key] = make_asdf_bytes(
+                    make_metadata(instrument, reftype, rng, invalid), asdf_shape)
+            write_sparse(os.path.join(corpus_dir, name + ".asdf"), asdf_templates[template_key])
+
+################################################################################
+# Benchmark
+################################################################################
+
+def get_peak_rss_mb():
+    """
+    Returns the peak resident set size of this process and its children, in
+    MB (ru_maxrss is in kB on Linux)
+    """
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return peak / 1024.0
+
+def run_benchmark(corpus_dir, rules_dir, jobs):
+    """
+    Checks a corpus and returns the file count, wall time, peak RSS and the
+    total time spent in every stage. Meant to run in a fresh process
+    """
+    info_ref_files.set_rules_dir(rules_dir)
+
+    stage_seconds = dict((stage, 0.0) for stage in STAGES)
+    files = 0
+    start = time.perf_counter()
+    for result in info_ref_files.check_directory(corpus_dir, jobs):
+        files += 1
+        for stage, seconds in result.timings.items():
+            stage_seconds[stage] = stage_seconds.get(stage, 0.0) + seconds
+    wall_seconds = time.perf_counter() - start
+    return {
+        "files": files,
+        "seconds": wall_seconds,
+        "peak_rss_mb": get_peak_rss_mb(),
+        "stage_seconds": stage_seconds,
+    }
+
+def print_report(size, stats):
+    """
+    Prints the results of one corpus size
+    """
+    files_per_second = stats["files"] / stats["seconds"] if stats["seconds"] else 0.0
+    print ("Corpus of {} files: {:.2f} s, {:.1f} files/sec, peak RSS {:.1f} MB".format(
+        stats["files"], stats["seconds"], files_per_second, stats["peak_rss_mb"]))
+    for stage in STAGES:
+        seconds = stats["stage_seconds"].get(stage, 0.0)
+        print ("    {:<14} {:10.3f} s total {:10.1f} us/file".format(
+            stage, seconds, 1e6 * seconds / max(stats["files"], 1)))
+
+################################################################################
+# Main
+################################################################################
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark info_ref_files on synthetic reference files")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+        help="corpus sizes to benchmark (default: 100 1000 10000 100000)")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+        help="number of worker processes used to check files (default: 1)")
+    parser.add_argument("--workdir",
+        help="directory for the generated rules and corpora (default: a temporary directory)")
+    parser.add_argument("--keep", action="store_true",
+        help="keep the generated files instead of deleting them")
+    parser.add_argument("--data-shape", type=int, nargs=2, default=[2048, 2048],
+        help="shape of the float32 SCI extension of each FITS file (default: 2048 2048)")
+    parser.add_argument("--asdf-shape", type=int, nargs=2, default=[1024, 1024],
+        help="shape of the float32 array in each ASDF file (default: 1024 1024)")
+    parser.add_argument("--invalid-fraction", type=float, default=0.2,
+        help="fraction of files generated with invalid metadata (default: 0.2)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="info_ref_files_benchmark_")
+    rules_dir = os.path.join(workdir, "rules")
+    try:
+        write_rules(rules_dir)
+        for size in args.sizes:
+            corpus_dir = os.path.join(workdir, "corpus_{}".format(size))
+            if not os.path.isdir(corpus_dir):
+                print ("Generating {} files in {}".format(size, corpus_dir))
+                generate_corpus(corpus_dir, size, args.data_shape, args.asdf_shape,
+                    args.invalid_fraction, args.seed)
+            #A fresh process per corpus keeps the rule tables cold and peak RSS per corpus
+            with concurrent.futures.ProcessPoolExecutor(max_workers=1) as executor:
+                stats = executor.submit(run_benchmark, corpus_dir, rules_dir, args.jobs).result()
+            print_report(size, stats)
+    finally:
+        if not args.keep and not args.workdir:
+            shutil.rmtree(workdir)
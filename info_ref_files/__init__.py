@@ -0,0 +1,37 @@
+"""
+Checks JWST reference files (.fits, .json and .asdf) against the required
+keywords, valid parameters and required OR rules of their instrument.
+
+Run it with python -m info_ref_files DIRECTORY, or from python with
+info_ref_files.main([DIRECTORY, ...]) or check_directory(DIRECTORY).
+astropy, asdf and numpy are only imported once a file needing them is seen
+"""
+from .rules import (INSTRUMENTS, RULES_DIR_ENV, change_style, set_rules_dir,
+    get_rule_locations, set_rule_locations, get_rule_files, preload_rules,
+    get_rules_version)
+from .results import FileResult
+from .readers import (FITS_BLOCK_SIZE, FITS_CARD_SIZE, read_fits_header,
+    read_fits_header_cards, scan_fits_header, parse_fits_header, read_asdf_tree)
+from .files import (FILE_TYPES, walk_reference_files, make_scope,
+    read_reference_file, check_file, check_files, check_directory)
+from .watch import watch_directory
+from .stats import RunStats
+from .summary import Summary
+from .output import OUTPUT_FORMATS, write_results
+from .cli import main
+
+__all__ = [
+    "INSTRUMENTS", "RULES_DIR_ENV", "change_style", "set_rules_dir",
+    "get_rule_locations", "set_rule_locations", "get_rule_files", "preload_rules",
+    "get_rules_version",
+    "FileResult",
+    "FITS_BLOCK_SIZE", "FITS_CARD_SIZE", "read_fits_header",
+    "read_fits_header_cards", "scan_fits_header", "parse_fits_header", "read_asdf_tree",
+    "FILE_TYPES", "walk_reference_files", "make_scope",
+    "read_reference_file", "check_file", "check_files", "check_directory",
+    "watch_directory",
+    "RunStats",
+    "Summary",
+    "OUTPUT_FORMATS", "write_results",
+    "main",
+]
@@ -0,0 +1,19 @@
+"""
+Optional format backends (astropy, asdf, numpy), imported on first use
+"""
+import importlib
+
+_backends = {}
+
+def import_backend(name):
+    """
+    Imports an optional module the first time it is asked for and returns
+    it, or None if it is not installed, so a run only pays for the backends
+    of the file types it actually sees
+    """
+    if name not in _backends:
+        try:
+            _backends[name] = importlib.import_module(name)
+        except ImportError:
+            _backends[name] = None
+    return _backends[name]
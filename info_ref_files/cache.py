@@ -0,0 +1,68 @@
+"""
+SQLite cache of file results, keyed on the file and the rules version
+"""
+import os
+import json
+import sqlite3
+import hashlib
+import threading
+
+from .results import FileResult
+
+# Bump whenever the checks change in a way that makes old reports stale
+RESULT_CACHE_VERSION = 7
+HEADER_DIGEST_SIZE = 65536
+# New results are committed every this many, so a killed run keeps its work
+RESULT_CACHE_COMMIT_INTERVAL = 100
+
+_cache_connections = {}
+
+def get_file_stamp(path):
+    """
+    Returns (size, mtime, header digest) for a file. The digest covers the
+    leading bytes of the file, which hold the FITS primary header, the ASDF
+    tree or the JSON metadata
+    """
+    file_stat = os.stat(path)
+    with open(path, 'rb') as stamped_file:
+        header_digest = hashlib.sha1(stamped_file.read(HEADER_DIGEST_SIZE)).hexdigest()
+    return (file_stat.st_size, file_stat.st_mtime_ns, header_digest)
+
+def open_result_cache(cache_path):
+    """
+    Opens (creating if needed) the SQLite result cache. Connections are kept
+    per process and thread, since they cannot be shared with forked workers
+    or prefetch threads
+    """
+    connection_key = (cache_path, os.getpid(), threading.get_ident())
+    if connection_key not in _cache_connections:
+        connection = sqlite3.connect(cache_path, timeout=60)
+        connection.execute("CREATE TABLE IF NOT EXISTS file_results ("
+            "path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, "
+            "header_digest TEXT, rules_version TEXT, result TEXT)")
+        connection.commit()
+        _cache_connections[connection_key] = connection
+    return _cache_connections[connection_key]
+
+def get_cached_result(connection, path, stamp, version):
+    """
+    Returns the cached FileResult for a file, or None if there is none or
+    the file or the rules changed since it was stored
+    """
+    row = connection.execute("SELECT size, mtime, header_digest, rules_version, result "
+        "FROM file_results WHERE path = ?", (path,)).fetchone()
+    if row is None or tuple(row[:3]) != stamp or row[3] != version:
+        return None
+    result = FileResult.from_dict(json.loads(row[4]))
+    result.cached = True
+    return result
+
+def store_result(connection, path, stamp, version, result):
+    """
+    Stores the FileResult for a file in the result cache
+    """
+    (size, mtime, header_digest) = stamp
+    record = result.to_dict()
+    record["messages"] = result.messages
+    connection.execute("INSERT OR REPLACE INTO file_results VALUES (?, ?, ?, ?, ?, ?)",
+        (path, size, mtime, header_digest, version, json.dumps(record, default=str)))
@@ -0,0 +1,145 @@
+"""
+Usability, required keyword and required OR checks
+"""
+from .rules import change_style, get_required_key_set, get_required_or_rules
+
+def check_usability(file_header, result):
+    """
+    Checks to make sure all necessary headers are present
+    """
+    status = True
+
+    if 'INSTRUME' in file_header:
+        if change_style(file_header['INSTRUME']):
+            pass
+        else:
+            result.error("Not a valid value for INSTRUME: {}".format(file_header['INSTRUME']))
+            status = False
+    else:
+        result.error("Missing INSTRUME header in file ")
+        status = False
+    if 'REFTYPE' in file_header:
+        pass
+    else:
+        result.error("Missing REFTYPE header in file ")
+        status = False
+
+    result.usable = status
+    return status
+
+def get_file_headers(file_header):
+    """
+    Returns header values for the most frequently accessed headers
+    """
+    if 'TELESCOP' in file_header:
+        get_instrume = file_header['INSTRUME']
+        get_telescop = file_header['TELESCOP']
+        get_reftype = file_header['REFTYPE']
+        return (get_instrume, get_telescop, get_reftype)
+    else:
+        get_instrume = file_header['INSTRUME']
+        get_telescop = False
+        get_reftype = file_header['REFTYPE']
+        return (get_instrume, get_telescop, get_reftype)
+
+def has_or_value(value):
+    """
+    Checks whether a header value holds alternatives ('|') or N/A
+    """
+    return isinstance(value, str) and ("|" in value or "/" in value)
+
+def get_required_ors(get_instrume, get_reftype, filename, file_hdu, type, result):
+    elements_without_or = []
+
+    # Checks to see if file type is in csv
+    or_rules = get_required_or_rules(get_instrume, get_reftype)
+    if or_rules is None:
+        return
+    for or_rule in or_rules:
+        if or_rule.target is None:
+            if or_rule.keyword not in file_hdu:
+                result.warn("WARNING: {} not in {}'s header".format(or_rule.keyword,filename))
+            elif not has_or_value(file_hdu[or_rule.keyword]) and (or_rule.keyword not in elements_without_or):
+                elements_without_or.append(or_rule.keyword)
+        elif or_rule.keyword in file_hdu and or_rule.target in file_hdu:
+            if (file_hdu[or_rule.keyword] == or_rule.value) != or_rule.negated:
+                alternatives = set(str(file_hdu[or_rule.target]).split("|"))
+                if (not alternatives.issubset(or_rule.allowed)) and (or_rule.target not in elements_without_or):
+                    elements_without_or.append(or_rule.target)
+            elif not has_or_value(file_hdu[or_rule.keyword]) and (or_rule.keyword not in elements_without_or):
+                elements_without_or.append(or_rule.keyword)
+    if elements_without_or:
+        result.or_violations.extend(elements_without_or)
+        result.say("WARNING: Headers {} in {} needs to have an '|', 'N/A', or valid value".format(elements_without_or,filename))
+
+def check_required_keys(instrument, filename, file_header, result):
+    """
+    Checks to see that all the required keywords are present with the file.
+    If not, it returns those values.
+    If the file used to check these values is not present, that will be returned
+    instead
+    """
+    check_if_filename_present = False
+    missing_keys = []
+    (get_instrume, get_telescop, get_reftype) = get_file_headers(file_header)
+
+    #INSTRUME and REFTYPE have valid values
+    required_key_set = get_required_key_set(get_instrume, get_reftype, get_telescop)
+    if required_key_set is not None:
+        check_if_filename_present = True
+        (required_keys, key_order, telescop_matched) = required_key_set
+        if not required_keys.issubset(file_header):
+            missing_keys = [key for key in key_order if key not in file_header]
+        result.missing_keys.extend(missing_keys)
+        #TELESCOP exists and has a matching value
+        if telescop_matched:
+            if not missing_keys:
+                result.say("Required keywords are present")
+            else:
+                result.say("Missing keywords in {}: {}".format(filename, missing_keys))
+        #TELESCOP exists but does not have a valid value or does not exist
+        else:
+            if missing_keys:
+                result.say("Missing keywords in {}: {}".format(filename, missing_keys))
+            else:
+                if get_telescop:
+                    result.warn("Check TELESCOP value: {}".format(file_header["TELESCOP"]))
+                else:
+                    result.warn("Set valid value for TELESCOP")
+
+    if not check_if_filename_present:
+        result.error("ERROR: Could not find file to check required keys for {}".format(filename))
+        if get_reftype:
+            result.error("The REFTYPE may be invalid: {}".format(get_reftype))
+
+JSON_REQUIRED_KEYWORDS = ["title", "reftype", "pedigree", "author", "telescope", "exp_type",\
+    "instrument", "useafter", "description", "HISTORY", "msaoper"]
+ASDF_REQUIRED_KEYWORDS = ["title", "reftype", "pedigree", "author", "telescope", "exp_type",\
+    "instrument", "useafter", "description", "history"]
+
+def check_usability_json_asdf(file_header, result):
+    """
+    Checks that a JSON or ASDF file is for an instrument there are rules for
+    """
+    if change_style(file_header["instrument"]):
+        return True
+    result.error("Not a valid value for instrument: {}".format(file_header["instrument"]))
+    result.usable = False
+    return False
+
+def check_required_keys_json_asdf(file_type, file_header, result):
+    if file_type == "json":
+        required_keywords = JSON_REQUIRED_KEYWORDS
+    elif file_type == "asdf":
+        required_keywords = ASDF_REQUIRED_KEYWORDS
+    if set(required_keywords).issubset(set(file_header)):
+        result.say("All required keys are present")
+        return True
+    else:
+        missing_keys = []
+        for key in required_keywords:
+            if key not in file_header:
+                missing_keys.append(key)
+        result.missing_keys.extend(missing_keys)
+        result.say("Missing keys in file: {}".format(missing_keys))
+        return False
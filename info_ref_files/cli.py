@@ -0,0 +1,128 @@
+"""
+Command line interface
+"""
+import os
+import sys
+import csv
+import argparse
+
+from .backends import import_backend
+from .rules import RULES_DIR_ENV, set_rules_dir, preload_rules
+from .files import DEFAULT_IO_THREADS, make_scope, check_directory
+from .watch import DEFAULT_WATCH_INTERVAL, watch_directory
+from .stats import DEFAULT_PROFILE_TOP, RunStats, record_stats, keep_slowest_profiles, dump_profiles
+from .summary import DEFAULT_SUMMARY_TOP, SUMMARY_CSV_COLUMNS, Summary, record_summary
+from .output import OUTPUT_FORMATS, OUTPUT_BUFFER_SIZE, write_results
+
+def main(argv=None):
+    """
+    Checks the reference files in a directory, with the options given in
+    argv (sys.argv by default)
+    """
+    parser = argparse.ArgumentParser(prog="info_ref_files")
+    parser.add_argument("chosen_directory", help="the directory of fits files to be run")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+        help="number of worker processes used to check files (default: 1)")
+    parser.add_argument("--cache",
+        help="SQLite file used to skip files unchanged since the last run")
+    parser.add_argument("-r", "--recursive", action="store_true",
+        help="also check files in subdirectories")
+    parser.add_argument("--include", action="append", metavar="GLOB",
+        help="only check files whose name or relative path matches GLOB (repeatable)")
+    parser.add_argument("--exclude", action="append", metavar="GLOB",
+        help="skip files and directories whose name or relative path matches GLOB (repeatable)")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="text",
+        help="output one text report, JSON record or CSV row per file (default: text)")
+    parser.add_argument("-o", "--output",
+        help="file to write the results to (default: stdout)")
+    parser.add_argument("--rules-dir", default=os.environ.get(RULES_DIR_ENV),
+        help="directory holding required_keywords/, valid_params/ and required_or.csv "
+        "(default: ${} or the /grp/hst/cdbs/tools/jwst/ rules)".format(RULES_DIR_ENV))
+    parser.add_argument("--prefetch", type=int, default=0, metavar="N",
+        help="read up to N files ahead in background threads while checking, "
+        "to hide storage latency (only used with --jobs 1)")
+    parser.add_argument("--io-threads", type=int, metavar="M",
+        help="number of threads reading files ahead (default: min(N, {}))".format(DEFAULT_IO_THREADS))
+    parser.add_argument("--instrument", action="append", metavar="NAME",
+        help="only report files whose INSTRUME is NAME or missing (repeatable); "
+        "other FITS files are skipped without reading their full header")
+    parser.add_argument("--reftype", action="append", metavar="NAME",
+        help="only report files whose REFTYPE is NAME or missing (repeatable)")
+    parser.add_argument("--batch", action="store_true",
+        help="read every file first, then check the valid parameters of all of "
+        "them together as columns (needs numpy)")
+    parser.add_argument("--stats", action="store_true",
+        help="print per stage counts and p50/p95/p99 latencies to stderr at the end")
+    parser.add_argument("--profile", metavar="DIR",
+        help="profile every file with cProfile and write the stats of the slowest ones to DIR")
+    parser.add_argument("--profile-top", type=int, default=DEFAULT_PROFILE_TOP, metavar="N",
+        help="number of slowest files to keep profiles of (default: {})".format(DEFAULT_PROFILE_TOP))
+    parser.add_argument("--watch", action="store_true",
+        help="after checking the directory, keep running and check every "
+        "reference file delivered to or modified in it until interrupted")
+    parser.add_argument("--watch-interval", type=float, default=DEFAULT_WATCH_INTERVAL, metavar="SECONDS",
+        help="seconds between scans when watching without inotify (default: {})".format(DEFAULT_WATCH_INTERVAL))
+    parser.add_argument("--watch-polling", action="store_true",
+        help="watch by scanning the directory even where inotify is available")
+    parser.add_argument("--summary", action="store_true",
+        help="print file counts per instrument and reftype and the most common "
+        "failing keywords to stderr at the end")
+    parser.add_argument("--summary-top", type=int, default=DEFAULT_SUMMARY_TOP, metavar="N",
+        help="number of failures listed in the summary (default: {})".format(DEFAULT_SUMMARY_TOP))
+    parser.add_argument("--summary-csv", metavar="FILE",
+        help="write every summary count as a CSV row of {} to FILE".format(", ".join(SUMMARY_CSV_COLUMNS)))
+    args = parser.parse_args(argv)
+
+    if args.batch and import_backend("numpy") is None:
+        parser.error("--batch needs numpy")
+    if args.batch and args.watch:
+        parser.error("--batch cannot be used with --watch")
+    if args.rules_dir:
+        set_rules_dir(args.rules_dir)
+    try:
+        preload_rules()
+    except (IOError, ValueError) as e:
+        parser.error(str(e))
+
+    directory = args.chosen_directory
+    scope = make_scope(args.instrument, args.reftype)
+    #directory = "/grp/crds/jwst/references/jwst/"
+    #directory = "/user/rmiller/CDBS/testfile"
+    #directory = "/Users/javerbukh/Documents/Info_reference_files"
+    if args.watch:
+        results = watch_directory(directory, args.jobs, args.cache, args.recursive,
+            args.include, args.exclude, args.prefetch, args.io_threads,
+            bool(args.profile), args.watch_interval, args.watch_polling, scope)
+    else:
+        results = check_directory(directory, args.jobs, args.cache, args.recursive,
+            args.include, args.exclude, args.prefetch, args.io_threads, args.batch,
+            bool(args.profile), scope)
+    if args.summary or args.summary_csv:
+        summary = Summary()
+        results = record_summary(results, summary)
+    if args.stats:
+        run_stats = RunStats()
+        results = record_stats(results, run_stats)
+    if args.profile:
+        slowest = []
+        results = keep_slowest_profiles(results, slowest, args.profile_top)
+    try:
+        if args.output:
+            with open(args.output, 'w', buffering=OUTPUT_BUFFER_SIZE, newline='') as output:
+                write_results(results, args.format, output, args.watch)
+        else:
+            write_results(results, args.format, flush=args.watch)
+    except KeyboardInterrupt:
+        if not args.watch:
+            raise
+    if args.profile:
+        sys.stderr.write(dump_profiles(slowest, args.profile))
+    if args.stats:
+        sys.stderr.write(run_stats.format())
+    if args.summary:
+        sys.stderr.write(summary.format(args.summary_top))
+    if args.summary_csv:
+        with open(args.summary_csv, 'w', newline='') as summary_file:
+            csv_writer = csv.writer(summary_file)
+            csv_writer.writerow(SUMMARY_CSV_COLUMNS)
+            csv_writer.writerows(summary.rows())
@@ -0,0 +1,360 @@
+"""
+Finding reference files and running every check that applies to them
+"""
+import os
+import json
+import fnmatch
+import functools
+import collections
+import multiprocessing
+import concurrent.futures
+
+from .rules import get_rule_locations, set_rule_locations, preload_rules, get_rules_version, _rule_rows
+from .results import FileResult
+from .checks import check_usability, get_required_ors, check_required_keys, check_required_keys_json_asdf, \
+    check_usability_json_asdf
+from .valid_params import normalize_fits_header, normalize_json_asdf_header, check_valid_params, check_deferred_valid_params
+from .readers import read_fits_header, scan_fits_header, parse_fits_header, read_asdf_tree
+from .cache import RESULT_CACHE_VERSION, RESULT_CACHE_COMMIT_INTERVAL, get_file_stamp, open_result_cache, \
+    get_cached_result, store_result
+from .stats import profile_check
+
+FILE_TYPES = {".fits": "fits", ".json": "json", ".asdf": "asdf"}
+CHECKED_EXTENSIONS = tuple(FILE_TYPES)
+DEFAULT_IO_THREADS = 8
+
+def matches_any(name, relative_path, patterns):
+    """
+    Checks a file or directory name, or its path relative to the directory
+    being checked, against a list of glob patterns
+    """
+    for pattern in patterns:
+        if fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(relative_path, pattern):
+            return True
+    return False
+
+def walk_reference_files(directory, recursive=False, include=None, exclude=None):
+    """
+    Yields the path, relative to directory, of every .fits, .json and .asdf
+    file in it as soon as it is found. Entries are typed from the cached
+    os.scandir information, so no extra stat is needed per entry. Excluded
+    directories are not descended into, while directories named like a
+    reference file are descended into like any other
+    """
+    include = include or []
+    exclude = exclude or []
+    pending = collections.deque([""])
+    while pending:
+        relative_dir = pending.popleft()
+        with os.scandir(os.path.join(directory, relative_dir)) as entries:
+            for entry in entries:
+                name = entry.name
+                if name.endswith(CHECKED_EXTENSIONS) and entry.is_file():
+                    relative_path = os.path.join(relative_dir, name)
+                    if include and not matches_any(name, relative_path, include):
+                        continue
+                    if exclude and matches_any(name, relative_path, exclude):
+                        continue
+                    yield relative_path
+                elif recursive and entry.is_dir(follow_symlinks=False):
+                    relative_path = os.path.join(relative_dir, name)
+                    if exclude and matches_any(name, relative_path, exclude):
+                        continue
+                    pending.append(relative_path)
+
+def make_scope(instruments=None, reftypes=None):
+    """
+    Returns the scope check_file limits itself to, a pair of sets of upper
+    cased INSTRUME and REFTYPE values, or None if neither is limited
+    """
+    if not instruments and not reftypes:
+        return None
+    return (frozenset(instrument.upper() for instrument in instruments or []),
+        frozenset(reftype.upper() for reftype in reftypes or []))
+
+def in_scope(instrument, reftype, scope):
+    """
+    Checks an INSTRUME and REFTYPE against a scope from make_scope. An empty
+    set in the scope allows any value, and a missing (None) INSTRUME or
+    REFTYPE is never out of scope, so files without them are still reported
+    """
+    if scope is None:
+        return True
+    (instruments, reftypes) = scope
+    return (not instruments or instrument is None or str(instrument).upper() in instruments) and \
+        (not reftypes or reftype is None or str(reftype).upper() in reftypes)
+
+def read_reference_file(path, file_type):
+    """
+    Returns the FITS primary header, JSON contents or ASDF tree of a file.
+    This is the only part of checking a file that touches the file itself.
+    Raises ValueError if a JSON file or ASDF tree does not hold a mapping
+    """
+    if file_type == "fits":
+        return read_fits_header(path)
+    elif file_type == "json":
+        with open(path) as json_file:
+            file_header = json.load(json_file)
+    else:
+        file_header = read_asdf_tree(path)
+    if not isinstance(file_header, dict):
+        raise ValueError("{} does not hold a mapping of keywords".format(path))
+    return file_header
+
+def check_file(directory, filename, prefetched=None, batch=False, scope=None):
+    """
+    Runs every check that applies to a single .fits, .json or .asdf file and
+    returns its FileResult, or None if the file is outside of scope.
+    prefetched is an optional future for the read_reference_file call of
+    this file. With batch the valid parameter check is left for
+    check_deferred_valid_params.
+
+    An unexpected error in one of the checks is recorded as an error of the
+    file instead of stopping the whole run
+    """
+    file_type = FILE_TYPES.get(os.path.splitext(filename)[1])
+    result = FileResult(filename, file_type)
+    try:
+        return run_checks(directory, filename, result, prefetched, batch, scope)
+    except Exception as e:
+        result.deferred_valid_params = None
+        result.error("ERROR: Could not check {}: {!r}".format(filename, e))
+        return result
+
+def run_checks(directory, filename, result, prefetched=None, batch=False, scope=None):
+    """
+    Does the work of check_file, recording the findings in result.
+
+    Unless it was prefetched, a FITS file is opened once to map its header
+    blocks and look up INSTRUME, REFTYPE and TELESCOP. The full header is
+    only built from those same bytes when that is not enough to find the
+    file unusable or out of scope
+    """
+    new_path = str(os.path.join(directory, filename))
+    file_type = result.file_type
+    scanned_header = None
+    if file_type == "fits" and prefetched is None:
+        try:
+            with result.timed("scan"):
+                (scanned_header, header_bytes) = scan_fits_header(new_path)
+        except Exception:
+            #Leave it to the full read to decide whether the file is valid
+            scanned_header = None
+        if scanned_header is not None:
+            result.instrument = scanned_header.get('INSTRUME')
+            result.reftype = scanned_header.get('REFTYPE')
+            if not in_scope(result.instrument, result.reftype, scope):
+                return None
+            with result.timed("usability"):
+                if not check_usability(scanned_header, result):
+                    return result
+    try:
+        with result.timed("read"):
+            if prefetched is not None:
+                file_header = prefetched.result()
+            elif scanned_header is not None:
+                file_header = parse_fits_header(header_bytes)
+            else:
+                file_header = read_reference_file(new_path, file_type)
+    except Exception:
+        result.readable = False
+        result.error("NOT A VALID FILE")
+        return result
+    if file_type == "fits":
+        if scanned_header is None:
+            result.instrument = file_header.get('INSTRUME')
+            result.reftype = file_header.get('REFTYPE')
+            if not in_scope(result.instrument, result.reftype, scope):
+                return None
+            with result.timed("usability"):
+                usable = check_usability(file_header, result)
+        else:
+            usable = True
+        if usable:
+            instrument_team = file_header['INSTRUME']
+            ref_type = file_header['REFTYPE']
+            with result.timed("required_ors"):
+                get_required_ors(instrument_team, ref_type, filename, file_header, "FITS", result)
+            with result.timed("required_keys"):
+                check_required_keys(instrument_team, filename, file_header, result)
+            normalized_header = normalize_fits_header(instrument_team, file_header)
+            if batch:
+                result.deferred_valid_params = (instrument_team, normalized_header)
+            else:
+                with result.timed("valid_params"):
+                    check_valid_params(instrument_team, normalized_header, result)
+    else:
+        result.instrument = file_header.get("instrument")
+        result.reftype = file_header.get("reftype")
+        if not in_scope(result.instrument, result.reftype, scope):
+            return None
+        with result.timed("required_keys"):
+            has_required_keys = check_required_keys_json_asdf(file_type, file_header, result)
+        if has_required_keys:
+            with result.timed("usability"):
+                usable = check_usability_json_asdf(file_header, result)
+        if has_required_keys and usable:
+            instrument = file_header["instrument"]
+            normalized_header = normalize_json_asdf_header(instrument, file_type, file_header)
+            if batch:
+                result.deferred_valid_params = (instrument, normalized_header)
+            else:
+                with result.timed("valid_params"):
+                    check_valid_params(instrument, normalized_header, result)
+    return result
+
+def lookup_cached_result(cache_path, version, path):
+    """
+    Returns (cached result or None, stamp) for a file. stamp is None when
+    the file could not be stamped
+    """
+    try:
+        stamp = get_file_stamp(path)
+    except (IOError, OSError):
+        return (None, None)
+    return (get_cached_result(open_result_cache(cache_path), path, stamp, version), stamp)
+
+def prefetch_cached(cache_path, version, path, file_type):
+    """
+    Prefetch task for check_file_cached. Looks the file up in the cache and
+    only reads it when there is no cached result, returning (cached result
+    or None, stamp, future for the read_reference_file call)
+    """
+    (result, stamp) = lookup_cached_result(cache_path, version, os.path.abspath(path))
+    file_header = concurrent.futures.Future()
+    if result is None:
+        try:
+            file_header.set_result(read_reference_file(path, file_type))
+        except Exception as e:
+            file_header.set_exception(e)
+    return (result, stamp, file_header)
+
+def check_file_cached(directory, cache_path, version, filename, prefetched=None, batch=False, scope=None):
+    """
+    Returns (result, stamp) for a file, reusing the cached result when the
+    file and the rules are unchanged. stamp is None when the result came
+    from the cache or the file could not be stamped, and result is None
+    when the file is outside of scope. prefetched is an optional future for
+    the prefetch_cached call of this file
+    """
+    path = os.path.abspath(os.path.join(directory, filename))
+    if prefetched is None:
+        (result, stamp) = lookup_cached_result(cache_path, version, path)
+    else:
+        (result, stamp, prefetched) = prefetched.result()
+    if result is not None:
+        if not in_scope(result.instrument, result.reftype, scope):
+            return (None, None)
+        return (result, None)
+    return (check_file(directory, filename, prefetched, batch, scope), stamp)
+
+def init_worker(rule_locations, rule_rows):
+    """
+    Seeds a pool worker with the rule tables already parsed by the parent
+    """
+    set_rule_locations(rule_locations)
+    _rule_rows.update(rule_rows)
+
+def iter_results(check, filenames, jobs=1):
+    """
+    Yields check(filename) for every file, in the order of filenames. With
+    more than one job the files are checked in a process pool
+    """
+    if jobs <= 1:
+        for filename in filenames:
+            yield check(filename)
+        return
+
+    pool = multiprocessing.Pool(jobs, initializer=init_worker, initargs=(get_rule_locations(), preload_rules()))
+    try:
+        for result in pool.imap(check, filenames, chunksize=8):
+            yield result
+    finally:
+        pool.close()
+        pool.join()
+
+def iter_prefetched_results(check, read, directory, filenames, prefetch, io_threads=None):
+    """
+    Yields check(filename, prefetched) for every file, in the order of
+    filenames, while a pool of io_threads threads runs read(path, file_type)
+    for the files ahead of the checks. At most prefetch files are read
+    ahead, so a slow consumer holds back the readers instead of piling up
+    headers in memory
+    """
+    io_threads = io_threads or min(prefetch, DEFAULT_IO_THREADS)
+    with concurrent.futures.ThreadPoolExecutor(io_threads) as executor:
+        pending = collections.deque()
+        for filename in filenames:
+            file_type = FILE_TYPES.get(os.path.splitext(filename)[1])
+            prefetched = executor.submit(read,
+                str(os.path.join(directory, filename)), file_type)
+            pending.append((filename, prefetched))
+            if len(pending) > prefetch:
+                yield check(*pending.popleft())
+        while pending:
+            yield check(*pending.popleft())
+
+def check_directory(directory, jobs=1, cache_path=None, recursive=False,
+    include=None, exclude=None, prefetch=0, io_threads=None, batch=False,
+    profile=False, scope=None):
+    """
+    Yields the FileResult of every reference file found by
+    walk_reference_files, in the order they are found. See check_files for
+    the other options
+    """
+    filenames = walk_reference_files(directory, recursive, include, exclude)
+    return check_files(directory, filenames, jobs, cache_path, prefetch,
+        io_threads, batch, profile, scope)
+
+def check_files(directory, filenames, jobs=1, cache_path=None, prefetch=0,
+    io_threads=None, batch=False, profile=False, scope=None):
+    """
+    Yields the FileResult of every file in filenames, paths relative to
+    directory, in the order of filenames. With a cache_path,
+    files that have not changed since the last run against the same rules
+    are reported from the cache instead of rechecked. With prefetch (used
+    when jobs is 1) the next prefetch files are looked up in the cache and,
+    when not cached, read by a thread pool while the current one is checked.
+    New cache entries are committed every RESULT_CACHE_COMMIT_INTERVAL
+    results and at the end. With batch the valid parameters of every
+    file are checked together once all files are read, so results only
+    start coming out at the end. With profile every file is checked under
+    cProfile and its stats are left in result.profile. With a scope from
+    make_scope, files of other instruments and reftypes are left out
+    """
+    if cache_path is None:
+        check = functools.partial(check_file, directory, batch=batch, scope=scope)
+        read = read_reference_file
+    else:
+        version = "{}:{}".format(RESULT_CACHE_VERSION, get_rules_version())
+        connection = open_result_cache(cache_path)
+        check = functools.partial(check_file_cached, directory, cache_path, version, batch=batch, scope=scope)
+        #Cached files are not read ahead
+        read = functools.partial(prefetch_cached, cache_path, version)
+    if profile:
+        check = functools.partial(profile_check, check)
+    if prefetch > 0 and jobs <= 1:
+        results = iter_prefetched_results(check, read, directory, filenames, prefetch, io_threads)
+    else:
+        results = iter_results(check, filenames, jobs)
+    if cache_path is None:
+        results = ((result, None) for result in results)
+    if batch:
+        results = list(results)
+        check_deferred_valid_params([result for (result, stamp) in results if result is not None])
+
+    stored = 0
+    try:
+        for (result, stamp) in results:
+            if result is None:
+                continue
+            if stamp is not None:
+                path = os.path.abspath(os.path.join(directory, result.filename))
+                store_result(connection, path, stamp, version, result)
+                stored += 1
+                if stored % RESULT_CACHE_COMMIT_INTERVAL == 0:
+                    connection.commit()
+            yield result
+    finally:
+        if cache_path is not None:
+            connection.commit()
@@ -0,0 +1,55 @@
+"""
+Writing results as text reports, JSON lines or CSV rows
+"""
+import sys
+import csv
+import json
+
+OUTPUT_FORMATS = ("text", "jsonl", "csv")
+OUTPUT_BUFFER_SIZE = 1 << 20
+CSV_COLUMNS = ["filename", "file_type", "instrument", "reftype", "status",
+    "missing_keys", "non_valid_params", "or_violations", "warnings", "errors",
+    "seconds"]
+
+def format_text(result):
+    """
+    Returns the human readable report for a file
+    """
+    lines = ["Checking {}".format(result.filename)] + result.messages
+    lines.append("------------------------------------------------------------\n")
+    return "\n".join(lines) + "\n"
+
+def format_csv_row(result):
+    """
+    Returns a row for CSV_COLUMNS, with list values encoded as JSON
+    """
+    record = result.to_dict()
+    row = []
+    for column in CSV_COLUMNS[:-1]:
+        value = record[column]
+        if isinstance(value, list):
+            value = json.dumps(value, default=str)
+        row.append(value)
+    row.append("{:.6f}".format(sum(result.timings.values())))
+    return row
+
+def write_results(results, output_format="text", output=None, flush=False):
+    """
+    Streams results to output (stdout by default) as text reports, one JSON
+    record per line or CSV rows. With flush every result is pushed out as
+    soon as it is written
+    """
+    if output is None:
+        output = sys.stdout
+    if output_format == "csv":
+        csv_writer = csv.writer(output)
+        csv_writer.writerow(CSV_COLUMNS)
+    for result in results:
+        if output_format == "jsonl":
+            output.write(json.dumps(result.to_dict(), default=str) + "\n")
+        elif output_format == "csv":
+            csv_writer.writerow(format_csv_row(result))
+        else:
+            output.write(format_text(result))
+        if flush:
+            output.flush()
@@ -0,0 +1,201 @@
+"""
+Header readers for FITS and ASDF files, with astropy and asdf loaded the
+first time a file of their type is read
+"""
+import os
+import mmap
+
+from .backends import import_backend
+
+FITS_BLOCK_SIZE = 2880
+FITS_CARD_SIZE = 80
+FITS_COMMENTARY_KEYWORDS = ("HISTORY", "COMMENT")
+FITS_SCAN_KEYWORDS = ("INSTRUME", "REFTYPE", "TELESCOP")
+FITS_END_CARD = b"END     "
+# Header blocks mapped by the first try of scan_fits_header, doubled until
+# the END card is found
+FITS_SCAN_BLOCKS = 8
+
+def read_fits_header(path):
+    """
+    Returns only the primary header of a FITS file. No data units are read
+    and the file is closed before returning
+    """
+    fits = import_backend("astropy.io.fits")
+    if fits is not None:
+        return fits.getheader(path, 0)
+    return read_fits_header_cards(path)
+
+def parse_fits_card_value(value_field):
+    """
+    Converts the value field of a FITS card (columns 11-80) to a python value
+    """
+    value_field = value_field.lstrip()
+    if value_field.startswith("'"):
+        #Quoted string, where '' stands for a single quote
+        value = []
+        i = 1
+        while i < len(value_field):
+            if value_field[i] == "'":
+                if value_field[i+1:i+2] == "'":
+                    value.append("'")
+                    i += 2
+                    continue
+                break
+            value.append(value_field[i])
+            i += 1
+        return "".join(value).rstrip()
+    value = value_field.split("/", 1)[0].strip()
+    if value == "T":
+        return True
+    elif value == "F":
+        return False
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value.replace("D", "E"))
+    except ValueError:
+        return value
+
+def find_fits_card(buffer, card_start, end):
+    """
+    Returns the offset of the first card of a FITS header buffer that starts
+    with card_start, looking only before end, or -1 if there is none
+    """
+    offset = buffer.find(card_start, 0, end)
+    while offset != -1 and offset % FITS_CARD_SIZE:
+        offset = buffer.find(card_start, offset + 1, end)
+    return offset
+
+def scan_fits_header(path, keywords=FITS_SCAN_KEYWORDS):
+    """
+    Returns (scanned header, header bytes) for the primary header of a FITS
+    file. The file is memory mapped a few header blocks at a time until the
+    END card turns up, so the data units are never mapped. The scanned
+    header is a dictionary of keyword -> value holding only the keywords
+    asked for, found without parsing any other card; the header bytes run
+    up to and including the END card, for parse_fits_header. Raises
+    ValueError if the file does not start like a FITS file or its header
+    has no END card
+    """
+    with open(path, 'rb') as fits_file:
+        file_size = os.fstat(fits_file.fileno()).st_size
+        length = min(file_size, FITS_SCAN_BLOCKS * FITS_BLOCK_SIZE)
+        while True:
+            with mmap.mmap(fits_file.fileno(), length, access=mmap.ACCESS_READ) as buffer:
+                if buffer[:9] != b"SIMPLE  =":
+                    raise ValueError("Not a FITS file: {}".format(path))
+                end = find_fits_card(buffer, FITS_END_CARD, length)
+                if end != -1:
+                    scanned_header = {}
+                    for keyword in keywords:
+                        offset = find_fits_card(buffer, keyword.ljust(8).encode('ascii') + b"= ", end)
+                        if offset != -1:
+                            value_field = buffer[offset+10:offset+FITS_CARD_SIZE].decode('ascii')
+                            scanned_header[keyword] = parse_fits_card_value(value_field)
+                    return (scanned_header, buffer[:end+FITS_CARD_SIZE])
+            if length == file_size:
+                raise ValueError("No END card found in {}".format(path))
+            length = min(file_size, 2 * length)
+
+def parse_fits_header(header_bytes):
+    """
+    Builds the primary header of a FITS file from the header bytes returned
+    by scan_fits_header, with astropy when it is installed
+    """
+    fits = import_backend("astropy.io.fits")
+    if fits is not None:
+        return fits.Header.fromstring(header_bytes)
+    return parse_fits_header_cards(header_bytes)
+
+def read_fits_header_cards(path):
+    """
+    Minimal reader for the primary header of a FITS file that does not need
+    astropy. Reads 2880 byte blocks up to the END card and parses them with
+    parse_fits_header_cards
+    """
+    blocks = []
+    with open(path, 'rb') as fits_file:
+        while True:
+            block = fits_file.read(FITS_BLOCK_SIZE)
+            if len(block) < FITS_BLOCK_SIZE:
+                raise ValueError("No END card found in {}".format(path))
+            blocks.append(block)
+            if find_fits_card(block, FITS_END_CARD, FITS_BLOCK_SIZE) != -1:
+                return parse_fits_header_cards(b"".join(blocks))
+
+def parse_fits_header_cards(header_bytes):
+    """
+    Parses the cards of a FITS header up to the END card into a dictionary
+    of keyword -> value, with HISTORY and COMMENT cards collected into lists
+    """
+    file_header = {}
+    last_keyword = None
+    for i in range(0, len(header_bytes) - FITS_CARD_SIZE + 1, FITS_CARD_SIZE):
+        card = header_bytes[i:i+FITS_CARD_SIZE].decode('ascii')
+        keyword = card[:8].rstrip()
+        if keyword == "END":
+            break
+        if keyword in FITS_COMMENTARY_KEYWORDS:
+            file_header.setdefault(keyword, []).append(card[8:].rstrip())
+        elif keyword == "CONTINUE" and last_keyword is not None:
+            #Long string values are split over CONTINUE cards
+            previous = file_header[last_keyword]
+            if isinstance(previous, str) and previous.endswith("&"):
+                file_header[last_keyword] = previous[:-1] + parse_fits_card_value(card[8:])
+        elif keyword and card[8:10] == "= ":
+            file_header[keyword] = parse_fits_card_value(card[10:])
+            last_keyword = keyword
+    return file_header
+
+ASDF_BLOCK_MAGIC = b"\xd3BLK"
+ASDF_TREE_END = b"\n...\n"
+ASDF_READ_SIZE = 65536
+
+def read_asdf_tree(path):
+    """
+    Returns the top level of an ASDF tree without loading any of its array
+    blocks. The file is closed before returning
+    """
+    asdf = import_backend("asdf")
+    if asdf is not None:
+        with asdf.open(path, lazy_load=True) as asdf_file:
+            return dict(asdf_file.tree)
+    return read_asdf_tree_yaml(path)
+
+def read_asdf_tree_yaml(path):
+    """
+    Reader for the tree of an ASDF file that does not need asdf. Reads the
+    YAML document up to its end marker or the first block, and loads it with
+    every ASDF tag treated as a plain mapping, sequence or scalar
+    """
+    import yaml
+
+    class AsdfTreeLoader(yaml.SafeLoader):
+        pass
+
+    def construct_tagged(loader, tag_suffix, node):
+        if isinstance(node, yaml.MappingNode):
+            return loader.construct_mapping(node, deep=True)
+        elif isinstance(node, yaml.SequenceNode):
+            return loader.construct_sequence(node, deep=True)
+        return loader.construct_scalar(node)
+
+    AsdfTreeLoader.add_multi_constructor("", construct_tagged)
+
+    tree_bytes = b""
+    with open(path, 'rb') as asdf_file:
+        while True:
+            chunk = asdf_file.read(ASDF_READ_SIZE)
+            tree_bytes += chunk
+            tree_end = tree_bytes.find(ASDF_TREE_END)
+            if tree_end == -1:
+                tree_end = tree_bytes.find(ASDF_BLOCK_MAGIC)
+            if tree_end != -1:
+                tree_bytes = tree_bytes[:tree_end]
+                break
+            if not chunk:
+                break
+    return yaml.load(tree_bytes.decode('utf-8'), Loader=AsdfTreeLoader) or {}
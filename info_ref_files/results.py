@@ -0,0 +1,98 @@
+"""
+The FileResult a file check records its findings in
+"""
+import time
+import contextlib
+
+class FileResult(object):
+    """
+    Outcome of checking one file. messages holds the human readable report in
+    the order the checks produced it, the other fields hold the same findings
+    in machine readable form
+    """
+    __slots__ = ("filename", "file_type", "instrument", "reftype", "readable",
+        "usable", "missing_keys", "non_valid_params", "or_violations", "warnings",
+        "errors", "messages", "timings", "deferred_valid_params", "cached", "profile")
+
+    def __init__(self, filename, file_type):
+        self.filename = filename
+        self.file_type = file_type
+        self.instrument = None
+        self.reftype = None
+        self.readable = True
+        self.usable = True
+        self.missing_keys = []
+        self.non_valid_params = []
+        self.or_violations = []
+        self.warnings = []
+        self.errors = []
+        self.messages = []
+        self.timings = {}
+        #(instrument, NormalizedHeader) while waiting for a batch check
+        self.deferred_valid_params = None
+        self.cached = False
+        #cProfile stats of the checks, when profiling
+        self.profile = None
+
+    def say(self, message):
+        self.messages.append(message)
+
+    def warn(self, message):
+        self.warnings.append(message)
+        self.messages.append(message)
+
+    def error(self, message):
+        self.errors.append(message)
+        self.messages.append(message)
+
+    @contextlib.contextmanager
+    def timed(self, stage):
+        """
+        Records the time spent in a block under timings[stage]
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[stage] = time.perf_counter() - start
+
+    @property
+    def status(self):
+        if not self.readable:
+            return "unreadable"
+        elif not self.usable:
+            return "unusable"
+        elif self.missing_keys or self.non_valid_params or self.or_violations or self.errors:
+            return "invalid"
+        return "valid"
+
+    def to_dict(self):
+        return {
+            "filename": self.filename,
+            "file_type": self.file_type,
+            "instrument": self.instrument,
+            "reftype": self.reftype,
+            "status": self.status,
+            "missing_keys": self.missing_keys,
+            "non_valid_params": self.non_valid_params,
+            "or_violations": self.or_violations,
+            "warnings": self.warnings,
+            "errors": self.errors,
+            "timings": self.timings,
+        }
+
+    @classmethod
+    def from_dict(cls, record):
+        result = cls(record["filename"], record["file_type"])
+        result.instrument = record["instrument"]
+        result.reftype = record["reftype"]
+        result.readable = record["status"] != "unreadable"
+        result.usable = record["status"] != "unusable"
+        result.missing_keys = record["missing_keys"]
+        result.non_valid_params = [tuple(pair) for pair in record["non_valid_params"]]
+        result.or_violations = record["or_violations"]
+        result.warnings = record["warnings"]
+        result.errors = record["errors"]
+        result.messages = record.get("messages", [])
+        result.timings = record["timings"]
+        return result
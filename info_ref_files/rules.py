@@ -0,0 +1,294 @@
+"""
+Rule tables: the required_keywords, valid_params and required_or csv files
+and the indexes compiled from them
+"""
+import os
+import re
+import csv
+import sys
+import json
+import hashlib
+
+def get_required_keywords_from_original():
+    """
+    Reads required_keywords.txt and organizes the values into a dictionary,
+    then seperates the values into csv files, based on which instrument they are
+    for
+    """
+    required_keywords = {}
+    f = open('required_keywords.txt', 'r')
+    curr_instrument = ""
+    for line in f:
+        if line[-2:] == ":\n":
+            instrument = line[:-2]
+            curr_instrument = instrument
+            if instrument not in required_keywords.keys():
+                required_keywords[instrument] = {}
+            #print (line[:-2])
+        elif line == "\n":
+            pass
+        else:
+            line = re.sub('[(),\'|]', '', line)
+            line = re.sub('\.', ' ', line)
+            new_line = line.split(' ')
+            final_line = []
+            final_line.append(new_line[0])
+            for l in range(1,len(new_line)):
+                temp_word = str(new_line[l][:8])
+                temp_word = re.sub('\n','',temp_word)
+                if temp_word not in final_line:
+                    final_line.append(temp_word)
+            required_keywords[curr_instrument][final_line[0]] = final_line[1:]
+    more_required = ['REFTYPE', 'DESCRIP', 'AUTHOR', 'PEDIGREE', 'HISTORY']
+    for k,v in required_keywords.iteritems():
+        path = 'required_keywords/' + k + '_required_keywords.csv'
+        with open(path, 'wb') as csvfile:
+            keywriter = csv.writer(csvfile, delimiter=' ', quotechar='|',quoting=csv.QUOTE_MINIMAL)
+            for key,value in v.iteritems():
+                keywriter.writerow([key]+value + more_required)
+
+def change_style(instrument):
+    if not isinstance(instrument, str):
+        return False
+    if instrument.lower() == "miri":
+        return "MIRI"
+    elif instrument.lower() == "niriss":
+        return "NIRISS"
+    elif instrument.lower() == "nircam":
+        return "NIRCam"
+    elif instrument.lower() == "nirspec":
+        return "NIRSpec"
+    elif instrument.lower() == "fgs":
+        return "FGS"
+    else:
+        return False
+
+################################################################################
+# Rule tables
+################################################################################
+
+REQUIRED_KEYWORDS_DIR = "/grp/hst/cdbs/tools/jwst/required_keywords/"
+VALID_PARAMS_DIR = "/grp/hst/cdbs/tools/jwst/valid_params/"
+REQUIRED_OR_FILE = "required_or.csv"
+RULES_DIR_ENV = "INFO_REF_FILES_RULES_DIR"
+INSTRUMENTS = ["MIRI", "NIRISS", "NIRCam", "NIRSpec", "FGS"]
+
+# Every rule csv is parsed at most once per process; the compiled indexes
+# below are shared by all of the checkers
+_rule_rows = {}
+_valid_params_index = {}
+_required_keys_index = {}
+_required_or_rules = {}
+
+def read_rule_rows(file_loc):
+    """
+    Parses one of the space delimited rule csv files and caches its rows
+    """
+    if file_loc not in _rule_rows:
+        with open(file_loc, 'r') as csvfile:
+            keyreader = csv.reader(csvfile, delimiter=' ', quotechar='|')
+            _rule_rows[file_loc] = [tuple(row) for row in keyreader if row]
+    return _rule_rows[file_loc]
+
+def set_rules_dir(rules_dir):
+    """
+    Points the checkers at a copy of the rules laid out as
+    rules_dir/required_keywords/, rules_dir/valid_params/ and
+    rules_dir/required_or.csv, and drops any rules already loaded
+    """
+    set_rule_locations((os.path.join(rules_dir, "required_keywords", ""),
+        os.path.join(rules_dir, "valid_params", ""),
+        os.path.join(rules_dir, "required_or.csv")))
+
+def get_rule_locations():
+    """
+    Returns the required_keywords directory, valid_params directory and
+    required_or file currently in use
+    """
+    return (REQUIRED_KEYWORDS_DIR, VALID_PARAMS_DIR, REQUIRED_OR_FILE)
+
+def set_rule_locations(rule_locations):
+    """
+    Sets the locations returned by get_rule_locations and drops any rules
+    already loaded
+    """
+    global REQUIRED_KEYWORDS_DIR, VALID_PARAMS_DIR, REQUIRED_OR_FILE
+    (REQUIRED_KEYWORDS_DIR, VALID_PARAMS_DIR, REQUIRED_OR_FILE) = rule_locations
+    for index in (_rule_rows, _valid_params_index, _required_keys_index, _required_or_rules):
+        index.clear()
+
+def get_rule_files():
+    """
+    Returns the path of every rule csv the checkers can use
+    """
+    rule_files = [REQUIRED_OR_FILE]
+    for instrument in INSTRUMENTS:
+        rule_files.append(REQUIRED_KEYWORDS_DIR + instrument + "_required_keywords.csv")
+        rule_files.append(VALID_PARAMS_DIR + instrument + "_valid_params.csv")
+    return rule_files
+
+def preload_rules():
+    """
+    Parses and compiles every rule csv up front and returns the parsed rows,
+    so they can be handed to worker processes. Raises IOError naming every
+    missing rule file, or ValueError for a row without a keyword or an
+    invalid OR rule
+    """
+    missing_files = [file_loc for file_loc in get_rule_files() if not os.path.isfile(file_loc)]
+    if missing_files:
+        raise IOError("Missing rule files: {}".format(", ".join(missing_files)))
+    for file_loc in get_rule_files():
+        for row in read_rule_rows(file_loc):
+            if not row[0]:
+                raise ValueError("Rule row without a keyword in {}: {}".format(file_loc, " ".join(row)))
+    for instrument in INSTRUMENTS:
+        load_valid_params(instrument)
+        load_required_keys(instrument)
+    load_required_or_rules()
+    return _rule_rows
+
+def get_rules_version():
+    """
+    Returns a digest of the rule rows this process checks with, which
+    changes whenever any of the rules change. Rows already loaded are used
+    as they are, so a long running process keeps the version of the rules
+    it loaded even if the csv files are edited afterwards
+    """
+    digest = hashlib.sha1()
+    for file_loc in get_rule_files():
+        if file_loc in _rule_rows or os.path.exists(file_loc):
+            digest.update(file_loc.encode('utf-8'))
+            for row in read_rule_rows(file_loc):
+                digest.update(json.dumps(row).encode('utf-8'))
+    return digest.hexdigest()
+
+def load_valid_params(instrument):
+    """
+    Returns a dictionary of keyword -> frozenset of valid values for an
+    instrument, in the same order as its valid_params csv
+    """
+    instrument_style = change_style(instrument)
+    if instrument_style not in _valid_params_index:
+        valid_params = {}
+        file_loc = VALID_PARAMS_DIR + instrument_style + "_valid_params.csv"
+        for row in read_rule_rows(file_loc):
+            values = set(row[1:])
+            #In the cases of SUBSTRT or SUBSIZE the header value is an int
+            for value in row[1:]:
+                try:
+                    values.add(int(value))
+                except ValueError:
+                    pass
+            valid_params[sys.intern(row[0])] = frozenset(values)
+        _valid_params_index[instrument_style] = valid_params
+    return _valid_params_index[instrument_style]
+
+def is_valid_value(value, valid_values):
+    """
+    Checks a header value against a compiled set of valid values. Only
+    strings and real ints are looked up, as True and 1.0 would otherwise
+    match a listed 1
+    """
+    if isinstance(value, str) or type(value) is int:
+        return value in valid_values
+    #Floats, bools and unhashable values such as HISTORY cards are never
+    #listed in the csv
+    return False
+
+def parse_required_keys_row_name(name, instrument):
+    """
+    Returns the (telescope, reftype) a required_keywords csv row is for, from
+    a name such as jwst_nircam_flat, or None if the name does not hold the
+    instrument. The telescope is empty when the name does not start with one
+    """
+    name_parts = name.lower().split("_")
+    if instrument.lower() not in name_parts:
+        return None
+    position = name_parts.index(instrument.lower())
+    return ("_".join(name_parts[:position]), "_".join(name_parts[position + 1:]))
+
+def load_required_keys(instrument):
+    """
+    Compiles an instrument's required_keywords csv into a dictionary of lower
+    case reftype -> (frozenset of required keywords, the same keywords in csv
+    order, lower case telescope). The first row for a reftype is used
+    """
+    instrument_style = change_style(instrument)
+    if instrument_style not in _required_keys_index:
+        required_keys = {}
+        file_loc = REQUIRED_KEYWORDS_DIR + instrument_style + "_required_keywords.csv"
+        for row in read_rule_rows(file_loc):
+            row_name = parse_required_keys_row_name(row[0], instrument_style)
+            if row_name is not None and row_name[1] not in required_keys:
+                (telescope, reftype) = row_name
+                required_keys[reftype] = (frozenset(row[1:]), row[1:], telescope)
+        _required_keys_index[instrument_style] = required_keys
+    return _required_keys_index[instrument_style]
+
+def get_required_key_set(get_instrume, get_reftype, get_telescop):
+    """
+    Returns (required keywords as a frozenset, the same keywords in csv order,
+    whether TELESCOP matched) for INSTRUME and REFTYPE, or None if the
+    instrument's required_keywords csv has no row for them
+    """
+    rule = load_required_keys(get_instrume).get(str(get_reftype).lower())
+    if rule is None:
+        return None
+    (required_keys, key_order, telescope) = rule
+    telescop_matched = bool(get_telescop) and str(get_telescop).lower() == telescope
+    return (required_keys, key_order, telescop_matched)
+
+class OrRule(object):
+    """
+    One compiled element of a required_or.csv row.
+
+    A plain KEYWORD element needs KEYWORD to hold an '|' or 'N/A' value.
+    A KEYWORD=value=TARGET=a|b element needs every '|' alternative of TARGET
+    to be one of a and b whenever KEYWORD is value; with a trailing =! the
+    condition is KEYWORD not being value instead. When the condition does
+    not hold, KEYWORD is checked as a plain element
+    """
+    __slots__ = ("keyword", "value", "target", "allowed", "negated")
+
+    def __init__(self, element):
+        parts = element.split("=")
+        self.keyword = parts[0]
+        if len(parts) == 1:
+            self.value = self.target = self.allowed = None
+            self.negated = False
+        elif len(parts) in (4, 5) and (len(parts) == 4 or parts[4] == "!"):
+            self.value = parts[1]
+            self.target = parts[2]
+            self.allowed = frozenset(parts[3].split("|"))
+            self.negated = len(parts) == 5
+        else:
+            raise ValueError("Invalid OR rule: {}".format(element))
+
+def parse_or_row_name(name):
+    """
+    Returns the (instrument, reftype) a required_or.csv row is for, from a
+    name such as nircam_flat or jwst_nircam_flat
+    """
+    name_parts = name.lower().split("_")
+    if name_parts[0] == "jwst":
+        name_parts = name_parts[1:]
+    return (name_parts[0], "_".join(name_parts[1:]))
+
+def load_required_or_rules():
+    """
+    Compiles required_or.csv into a dictionary of
+    (instrument, reftype) -> tuple of OrRules, both lower case
+    """
+    if not _required_or_rules:
+        for row in read_rule_rows(REQUIRED_OR_FILE):
+            lookup = parse_or_row_name(row[0])
+            or_rules = tuple(OrRule(element) for element in row[1:])
+            _required_or_rules[lookup] = _required_or_rules.get(lookup, ()) + or_rules
+    return _required_or_rules
+
+def get_required_or_rules(get_instrume, get_reftype):
+    """
+    Returns the OrRules for INSTRUME and REFTYPE, or None if required_or.csv
+    has no row for them
+    """
+    return load_required_or_rules().get((str(get_instrume).lower(), str(get_reftype).lower()))
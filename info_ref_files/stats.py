@@ -0,0 +1,134 @@
+"""
+Per stage latency stats and cProfile dumps of the slowest files
+"""
+import os
+import re
+import math
+import heapq
+import marshal
+import cProfile
+import collections
+
+STATS_STAGES = ["scan", "read", "usability", "required_ors", "required_keys", "valid_params"]
+# Latency histogram buckets are 2 ** (1 / 8) wide, about 9%
+STATS_BUCKETS_PER_DOUBLING = 8
+STATS_QUANTILES = [0.5, 0.95, 0.99]
+DEFAULT_PROFILE_TOP = 10
+
+class StageStats(object):
+    """
+    Count, total time and latency histogram of one stage. The histogram has
+    logarithmic buckets, so its size does not grow with the number of files
+    """
+    __slots__ = ("count", "total", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.buckets = collections.Counter()
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        microseconds = max(seconds * 1e6, 1.0)
+        self.buckets[int(math.ceil(math.log(microseconds, 2) * STATS_BUCKETS_PER_DOUBLING))] += 1
+
+    def quantile(self, q):
+        """
+        Returns the upper bound, in seconds, of the bucket holding quantile q
+        """
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= q * self.count:
+                return 2 ** (float(bucket) / STATS_BUCKETS_PER_DOUBLING) / 1e6
+        return 0.0
+
+class RunStats(object):
+    """
+    Per stage latency stats and per status file counters of a run. Results
+    that came from the cache are only counted
+    """
+    __slots__ = ("stages", "statuses", "cached")
+
+    def __init__(self):
+        self.stages = collections.OrderedDict((stage, StageStats()) for stage in STATS_STAGES)
+        self.statuses = collections.Counter()
+        self.cached = 0
+
+    def add(self, result):
+        self.statuses[result.status] += 1
+        if result.cached:
+            self.cached += 1
+            return
+        for (stage, seconds) in result.timings.items():
+            if stage not in self.stages:
+                self.stages[stage] = StageStats()
+            self.stages[stage].add(seconds)
+        if result.timings:
+            if "total" not in self.stages:
+                self.stages["total"] = StageStats()
+            self.stages["total"].add(sum(result.timings.values()))
+
+    def format(self):
+        lines = ["{:<14} {:>9} {:>11} {:>10} {:>10} {:>10}".format(
+            "Stage", "Count", "Total (s)", "p50 (ms)", "p95 (ms)", "p99 (ms)")]
+        for (stage, stage_stats) in self.stages.items():
+            if stage_stats.count:
+                lines.append("{:<14} {:>9} {:>11.3f} {:>10.3f} {:>10.3f} {:>10.3f}".format(
+                    stage, stage_stats.count, stage_stats.total,
+                    *[1e3 * stage_stats.quantile(q) for q in STATS_QUANTILES]))
+        statuses = ", ".join("{} {}".format(status, count) for (status, count) in sorted(self.statuses.items()))
+        lines.append("Files: {} ({}), from cache: {}".format(
+            sum(self.statuses.values()), statuses, self.cached))
+        return "\n".join(lines) + "\n"
+
+def record_stats(results, run_stats):
+    """
+    Passes results through while adding each of them to run_stats
+    """
+    for result in results:
+        run_stats.add(result)
+        yield result
+
+def profile_check(check, *args):
+    """
+    Runs check(*args) under cProfile and leaves the stats on the result
+    """
+    profiler = cProfile.Profile()
+    output = profiler.runcall(check, *args)
+    profiler.create_stats()
+    result = output[0] if isinstance(output, tuple) else output
+    if result is not None:
+        result.profile = profiler.stats
+    return output
+
+def keep_slowest_profiles(results, slowest, top=DEFAULT_PROFILE_TOP):
+    """
+    Passes results through, keeping the cProfile stats of the top slowest
+    checked files in slowest, a heap of (seconds, filename, stats)
+    """
+    for result in results:
+        if result.profile is not None:
+            entry = (sum(result.timings.values()), result.filename, result.profile)
+            result.profile = None
+            if len(slowest) < top:
+                heapq.heappush(slowest, entry)
+            else:
+                heapq.heappushpop(slowest, entry)
+        yield result
+
+def dump_profiles(slowest, profile_dir):
+    """
+    Writes the kept cProfile stats as .prof files, slowest first, and
+    returns a summary of them
+    """
+    if not os.path.isdir(profile_dir):
+        os.makedirs(profile_dir)
+    lines = ["Slowest files (cProfile stats in {}):".format(profile_dir)]
+    for (rank, (seconds, filename, stats)) in enumerate(sorted(slowest, reverse=True), 1):
+        profile_name = "{:03d}_{}.prof".format(rank, re.sub(r"[^\w.-]", "_", filename))
+        with open(os.path.join(profile_dir, profile_name), 'wb') as profile_file:
+            marshal.dump(stats, profile_file)
+        lines.append("{:>10.3f} ms  {}  {}".format(1e3 * seconds, filename, profile_name))
+    return "\n".join(lines) + "\n"
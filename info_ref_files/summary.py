@@ -0,0 +1,109 @@
+"""
+Aggregate counts of file statuses and failing keywords across a sweep
+"""
+import collections
+
+DEFAULT_SUMMARY_TOP = 10
+FILE_STATUSES = ["valid", "invalid", "unusable", "unreadable"]
+FAILURE_KINDS = ["missing", "non_valid", "or_violation"]
+SUMMARY_CSV_COLUMNS = ["instrument", "reftype", "keyword", "kind", "files"]
+
+def get_summary_group(result):
+    """
+    Returns the (instrument, reftype) a result is counted under, upper cased
+    so FITS, JSON and ASDF files of the same kind end up together
+    """
+    instrument = str(result.instrument).upper() if result.instrument else "-"
+    reftype = str(result.reftype).upper() if result.reftype else "-"
+    return (instrument, reftype)
+
+class Summary(object):
+    """
+    Counts of files per (instrument, reftype, status) and of files failing
+    per (instrument, reftype, keyword, failure kind). Nothing is kept per
+    file, so the memory used only grows with the number of distinct
+    instruments, reftypes and keywords, not with the number of files
+    """
+    __slots__ = ("files", "failures")
+
+    def __init__(self):
+        self.files = collections.Counter()
+        self.failures = collections.Counter()
+
+    def add(self, result):
+        (instrument, reftype) = get_summary_group(result)
+        self.files[(instrument, reftype, result.status)] += 1
+        failing = set()
+        for keyword in result.missing_keys:
+            failing.add((keyword, "missing"))
+        for (value, keyword) in result.non_valid_params:
+            failing.add((keyword, "non_valid"))
+        for keyword in result.or_violations:
+            failing.add((keyword, "or_violation"))
+        for (keyword, kind) in failing:
+            self.failures[(instrument, reftype, keyword, kind)] += 1
+
+    def group_files(self):
+        """
+        Returns an ordered dictionary of (instrument, reftype) -> Counter of
+        file statuses
+        """
+        groups = collections.OrderedDict()
+        for ((instrument, reftype, status), count) in sorted(self.files.items()):
+            groups.setdefault((instrument, reftype), collections.Counter())[status] += count
+        return groups
+
+    def rows(self):
+        """
+        Yields every counter as [instrument, reftype, keyword, kind, files].
+        File counts have an empty keyword and the status as their kind
+        """
+        for ((instrument, reftype, status), count) in sorted(self.files.items()):
+            yield [instrument, reftype, "", status, count]
+        for ((instrument, reftype, keyword, kind), count) in sorted(self.failures.items()):
+            yield [instrument, reftype, keyword, kind, count]
+
+    def format(self, top=DEFAULT_SUMMARY_TOP):
+        """
+        Returns a table of file statuses per instrument and reftype, the top
+        failing (instrument, reftype, keyword, kind) and the top failing
+        keywords of each instrument
+        """
+        groups = self.group_files()
+        lines = ["{:<10} {:<16} {:>9} {:>9} {:>9} {:>9} {:>10}".format(
+            "Instrument", "Reftype", "Files", *FILE_STATUSES)]
+        for ((instrument, reftype), statuses) in groups.items():
+            lines.append("{:<10} {:<16} {:>9} {:>9} {:>9} {:>9} {:>10}".format(
+                instrument, reftype, sum(statuses.values()),
+                *[statuses[status] for status in FILE_STATUSES]))
+
+        lines.append("")
+        lines.append("Top {} failures:".format(top))
+        lines.append("{:<10} {:<16} {:<10} {:<13} {:>9} {:>8}".format(
+            "Instrument", "Reftype", "Keyword", "Kind", "Files", "Share"))
+        offenders = sorted(self.failures.items(), key=lambda item: (-item[1], item[0]))[:top]
+        for ((instrument, reftype, keyword, kind), count) in offenders:
+            group_files = sum(groups[(instrument, reftype)].values())
+            lines.append("{:<10} {:<16} {:<10} {:<13} {:>9} {:>7.1f}%".format(
+                instrument, reftype, keyword, kind, count, 100.0 * count / group_files))
+
+        by_instrument = collections.Counter()
+        for ((instrument, reftype, keyword, kind), count) in self.failures.items():
+            by_instrument[(instrument, keyword, kind)] += count
+        instruments = sorted(set(instrument for (instrument, keyword, kind) in by_instrument))
+        for instrument in instruments:
+            lines.append("")
+            lines.append("Top {} failing keywords for {}:".format(top, instrument))
+            keywords = sorted(((key, count) for (key, count) in by_instrument.items() if key[0] == instrument),
+                key=lambda item: (-item[1], item[0]))[:top]
+            for ((instrument, keyword, kind), count) in keywords:
+                lines.append("    {:<10} {:<13} {:>9}".format(keyword, kind, count))
+        return "\n".join(lines) + "\n"
+
+def record_summary(results, summary):
+    """
+    Passes results through while adding each of them to summary
+    """
+    for result in results:
+        summary.add(result)
+        yield result
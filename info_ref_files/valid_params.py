@@ -0,0 +1,220 @@
+"""
+Valid parameter checks, one file at a time or many files as columns
+"""
+import re
+import sys
+import collections
+
+from .backends import import_backend
+from .rules import change_style, load_valid_params, is_valid_value
+from .checks import ASDF_REQUIRED_KEYWORDS
+
+DATETIME1 = re.compile(r"([1][9]|([2][0-1]))\d{2}-([0][0-9]|[1][0-2])-([0-2][0-9]|[3][0-1])T([0-1][0-9]|[2][0-3]):[0-5][0-9]:[0-5][0-9]")
+DATETIME2 = re.compile(r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}")
+INFLIGHT_DATETIME = re.compile(r"INFLIGHT ([1][9]|([2][0-1]))\d{2}-([0][0-9]|[1][0-2])-([0-2][0-9]|[3][0-1]) ([1][9]|([2][0-1]))\d{2}-([0][0-9]|[1][0-2])-([0-2][0-9]|[3][0-1])")
+VALID_PEDIGREES = frozenset(['SIMULATION', 'GROUND', 'DUMMY'])
+NON_EMPTY_KEYWORDS = frozenset(['AUTHOR', 'DESCRIP', 'HISTORY'])
+
+_normalized_keywords = {}
+
+class NormalizedHeader(object):
+    """
+    Format independent view of the metadata of a file, holding only the
+    keywords that have valid parameters, under their FITS style names
+    """
+    __slots__ = ("file_type", "cards")
+
+    def __init__(self, file_type, cards):
+        self.file_type = file_type
+        self.cards = cards
+
+def normalize_keyword(key):
+    """
+    Returns the interned FITS style keyword for a JSON or ASDF key, which is
+    the key upper cased and cut to 8 characters (7 for description)
+    """
+    if key not in _normalized_keywords:
+        if key == "description":
+            keyword = key[:7].upper()
+        else:
+            keyword = key[:8].upper()
+        _normalized_keywords[key] = sys.intern(keyword)
+    return _normalized_keywords[key]
+
+def normalize_fits_header(instrument, file_header):
+    """
+    Builds a NormalizedHeader from a FITS primary header
+    """
+    cards = {}
+    for keyword in load_valid_params(instrument):
+        if keyword in file_header:
+            cards[keyword] = file_header[keyword]
+    return NormalizedHeader("fits", cards)
+
+def normalize_json_asdf_header(instrument, file_type, file_header):
+    """
+    Builds a NormalizedHeader from a JSON file or the top level of an ASDF
+    tree. Only the required keywords are taken from an ASDF tree
+    """
+    valid_params = load_valid_params(instrument)
+    if file_type == "asdf":
+        keys = [key for key in ASDF_REQUIRED_KEYWORDS if key in file_header]
+    else:
+        keys = file_header
+    cards = {}
+    for key in keys:
+        keyword = normalize_keyword(key)
+        if keyword in valid_params:
+            cards[keyword] = file_header[key]
+    return NormalizedHeader(file_type, cards)
+
+def check_valid_value(keyword, value, valid_values):
+    """
+    Returns the non-valid (value, keyword) pairs and the warnings for the
+    value of one keyword
+    """
+    non_valid_params = []
+    warnings = []
+    #If OR is present in value
+    if isinstance(value, str) and "|" in value:
+        for or_value in value.split("|"):
+            if not is_valid_value(or_value, valid_values):
+                non_valid_params.append((or_value, keyword))
+    #Valid value
+    elif is_valid_value(value, valid_values):
+        pass
+    #Check USEAFTER
+    elif keyword == 'USEAFTER':
+        if isinstance(value, str) and DATETIME1.match(value):
+            pass
+        elif isinstance(value, str) and DATETIME2.match(value):
+            warnings.append("Correct format but inaccurate dates in USEAFTER")
+            non_valid_params.append((value, keyword))
+        else:
+            non_valid_params.append((value, keyword))
+    #Check PEDIGREE
+    elif keyword == 'PEDIGREE':
+        if is_valid_value(value, VALID_PEDIGREES) or \
+            (isinstance(value, str) and INFLIGHT_DATETIME.match(value)):
+            pass
+        else:
+            non_valid_params.append((value, keyword))
+    #Check's to see if certain headers are not empty
+    elif keyword in NON_EMPTY_KEYWORDS:
+        if value == "":
+            non_valid_params.append((value, keyword))
+    #Not a valid value
+    else:
+        non_valid_params.append((value, keyword))
+    return (non_valid_params, warnings)
+
+def check_valid_params(instrument, normalized_header, result):
+    """
+    Returns which paramters in the file are invalid, if any
+    """
+    findings = []
+    cards = normalized_header.cards
+    for (keyword, valid_values) in load_valid_params(instrument).items():
+        if keyword in cards:
+            findings.append(check_valid_value(keyword, cards[keyword], valid_values))
+    return report_valid_params(findings, result)
+
+def report_valid_params(findings, result):
+    """
+    Records the (non-valid pairs, warnings) findings of a file's keywords,
+    in keyword order, and returns the non-valid pairs
+    """
+    non_valid_params = []
+    for (keyword_non_valid_params, warnings) in findings:
+        non_valid_params.extend(keyword_non_valid_params)
+        for warning in warnings:
+            result.warn(warning)
+    result.non_valid_params.extend(non_valid_params)
+    if not non_valid_params:
+        result.say("All parameters are valid")
+    else:
+        result.say("Non-valid paramters (Format (Non-valid value, Header located in)): {}".format(non_valid_params))
+    return non_valid_params
+
+class HeaderColumn(object):
+    """
+    One keyword of a header table: the rows that have it, and their values
+    encoded as codes into a list of distinct values
+    """
+    __slots__ = ("rows", "codes", "categories")
+
+    def __init__(self, rows, codes, categories):
+        self.rows = rows
+        self.codes = codes
+        self.categories = categories
+
+def build_header_table(headers):
+    """
+    Turns a list of NormalizedHeaders into a columnar table of
+    keyword -> HeaderColumn, with every column categorically encoded
+    """
+    columns = {}
+    for (row, header) in enumerate(headers):
+        for (keyword, value) in header.cards.items():
+            if keyword not in columns:
+                columns[keyword] = ([], [], [], {})
+            (rows, codes, categories, category_codes) = columns[keyword]
+            #Keyed on the type too, so that 1, 1.0 and True stay apart
+            category_key = (value.__class__, value)
+            try:
+                code = category_codes.get(category_key)
+            except TypeError:
+                #Unhashable values such as HISTORY cards get a category each
+                category_key = None
+                code = None
+            if code is None:
+                code = len(categories)
+                categories.append(value)
+                if category_key is not None:
+                    category_codes[category_key] = code
+            rows.append(row)
+            codes.append(code)
+    numpy = import_backend("numpy")
+    table = {}
+    for (keyword, (rows, codes, categories, category_codes)) in columns.items():
+        table[keyword] = HeaderColumn(numpy.array(rows, dtype=numpy.intp),
+            numpy.array(codes, dtype=numpy.intp), categories)
+    return table
+
+def check_valid_params_batch(instrument, headers, results):
+    """
+    Checks the valid parameters of many files of one instrument at once.
+    Every distinct value of a keyword is checked once, and the rows holding
+    a non-valid value are picked out of the column with one array operation
+    """
+    numpy = import_backend("numpy")
+    findings = [[] for header in headers]
+    table = build_header_table(headers)
+    for (keyword, valid_values) in load_valid_params(instrument).items():
+        column = table.get(keyword)
+        if column is None:
+            continue
+        category_findings = [check_valid_value(keyword, value, valid_values)
+            for value in column.categories]
+        category_failed = numpy.array([bool(non_valid_params or warnings)
+            for (non_valid_params, warnings) in category_findings], dtype=bool)
+        for index in numpy.flatnonzero(category_failed[column.codes]):
+            findings[column.rows[index]].append(category_findings[column.codes[index]])
+    for (result, file_findings) in zip(results, findings):
+        report_valid_params(file_findings, result)
+
+def check_deferred_valid_params(results):
+    """
+    Runs check_valid_params_batch over every result whose valid parameter
+    check was deferred, one batch per instrument
+    """
+    batches = collections.OrderedDict()
+    for result in results:
+        if result.deferred_valid_params is not None:
+            (instrument, normalized_header) = result.deferred_valid_params
+            result.deferred_valid_params = None
+            batches.setdefault(change_style(instrument), ([], []))
+            batches[change_style(instrument)][0].append(normalized_header)
+            batches[change_style(instrument)][1].append(result)
+    for (instrument, (headers, instrument_results)) in batches.items():
+        check_valid_params_batch(instrument, headers, instrument_results)
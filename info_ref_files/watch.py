@@ -0,0 +1,173 @@
+"""
+Watching a directory for new or modified reference files
+"""
+import os
+import sys
+import time
+import struct
+import select
+import ctypes
+import ctypes.util
+import collections
+
+from .backends import import_backend
+from .files import CHECKED_EXTENSIONS, matches_any, walk_reference_files, check_directory, check_files
+
+DEFAULT_WATCH_INTERVAL = 0.5
+# inotify event masks, from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+INOTIFY_EVENT = struct.Struct("iIII")
+INOTIFY_READ_SIZE = 65536
+
+def load_inotify():
+    """
+    Returns libc when it provides inotify, None otherwise (not Linux, or a
+    libc without it)
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+def watch_inotify(libc, directory, recursive=False, include=None, exclude=None):
+    """
+    Yields an empty list once the watches are in place, then lists of the
+    reference files, relative to directory, that were finished writing or
+    moved into it since the last list. Files are only
+    reported once they are closed, so half delivered files are never seen.
+    New subdirectories are watched too when recursive
+    """
+    fd = libc.inotify_init1(IN_NONBLOCK)
+    if fd < 0:
+        raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+    mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+    watched = {}
+
+    def add_watch(relative_dir):
+        path = os.path.join(directory, relative_dir)
+        wd = libc.inotify_add_watch(fd, os.fsencode(path), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_add_watch failed", path)
+        watched[wd] = relative_dir
+        if recursive:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    relative_path = os.path.join(relative_dir, entry.name)
+                    if entry.is_dir(follow_symlinks=False) and not (exclude and matches_any(entry.name, relative_path, exclude)):
+                        add_watch(relative_path)
+
+    try:
+        add_watch("")
+        yield []
+        while True:
+            select.select([fd], [], [])
+            data = os.read(fd, INOTIFY_READ_SIZE)
+            changed = []
+            offset = 0
+            while offset < len(data):
+                (wd, event_mask, cookie, length) = INOTIFY_EVENT.unpack_from(data, offset)
+                offset += INOTIFY_EVENT.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                offset += length
+                if event_mask & IN_Q_OVERFLOW:
+                    #Events were dropped, so look at everything again
+                    changed.extend(walk_reference_files(directory, recursive, include, exclude))
+                    continue
+                if wd not in watched:
+                    continue
+                relative_path = os.path.join(watched[wd], name)
+                if event_mask & IN_ISDIR:
+                    if recursive and not (exclude and matches_any(name, relative_path, exclude)):
+                        #Files may have landed before the watch was added
+                        add_watch(relative_path)
+                        changed.extend(os.path.join(relative_path, filename) for filename in
+                            walk_reference_files(os.path.join(directory, relative_path), True, include, exclude))
+                    continue
+                if not event_mask & (IN_CLOSE_WRITE | IN_MOVED_TO) or not name.endswith(CHECKED_EXTENSIONS):
+                    continue
+                if include and not matches_any(name, relative_path, include):
+                    continue
+                if exclude and matches_any(name, relative_path, exclude):
+                    continue
+                #Only regular files, as walk_reference_files finds them
+                if not os.path.isfile(os.path.join(directory, relative_path)):
+                    continue
+                changed.append(relative_path)
+            if changed:
+                #One check per file even if it was written several times
+                yield list(collections.OrderedDict.fromkeys(changed))
+    finally:
+        os.close(fd)
+
+def watch_polling(directory, recursive=False, include=None, exclude=None,
+    interval=DEFAULT_WATCH_INTERVAL):
+    """
+    Yields an empty list once the first scan is done, then lists of the
+    reference files, relative to directory, that are new or modified, by
+    comparing the size and mtime of every file found by
+    walk_reference_files every interval seconds. A file is only reported
+    once it has stopped changing between two scans, so a delivery still
+    being copied is not checked half written
+    """
+    def scan():
+        stamps = {}
+        for filename in walk_reference_files(directory, recursive, include, exclude):
+            try:
+                stat = os.stat(os.path.join(directory, filename))
+            except OSError:
+                continue
+            stamps[filename] = (stat.st_size, stat.st_mtime_ns)
+        return stamps
+
+    reported = scan()
+    previous = reported
+    yield []
+    while True:
+        time.sleep(interval)
+        current = scan()
+        changed = [filename for (filename, stamp) in current.items()
+            if reported.get(filename) != stamp and previous.get(filename) == stamp]
+        for filename in changed:
+            reported[filename] = current[filename]
+        previous = current
+        if changed:
+            yield changed
+
+def watch_directory(directory, jobs=1, cache_path=None, recursive=False,
+    include=None, exclude=None, prefetch=0, io_threads=None, profile=False,
+    interval=DEFAULT_WATCH_INTERVAL, polling=False, scope=None):
+    """
+    Yields the FileResult of every reference file in directory, like
+    check_directory, then of every file delivered to or modified in it
+    until interrupted. inotify is used where available unless polling is
+    set; otherwise directory is scanned every interval seconds. The watch
+    starts before the first sweep, so nothing delivered during it is
+    missed. New files are checked in this process against the rules it has
+    already loaded, so a verdict costs no startup time
+    """
+    #Load the format backends now rather than on the first delivery
+    for backend in ("astropy.io.fits", "asdf"):
+        import_backend(backend)
+    libc = None if polling else load_inotify()
+    if libc is not None:
+        batches = watch_inotify(libc, directory, recursive, include, exclude)
+    else:
+        batches = watch_polling(directory, recursive, include, exclude, interval)
+    next(batches)
+    for result in check_directory(directory, jobs, cache_path, recursive,
+        include, exclude, prefetch, io_threads, False, profile, scope):
+        yield result
+    for filenames in batches:
+        for result in check_files(directory, filenames, 1, cache_path,
+            prefetch, io_threads, False, profile, scope):
+            yield result
@@ -0,0 +1,29 @@
+"""
+Tests for finding reference files and for check_file's handling of files
+it cannot check
+"""
+from info_ref_files import files
+from info_ref_files.files import walk_reference_files, check_file
+
+def test_walk_descends_into_directories_named_like_files(tmp_path):
+    (tmp_path / "d.fits" / "sub").mkdir(parents=True)
+    for path in ["top.fits", "notes.txt", "d.fits/inner.fits", "d.fits/sub/x.json"]:
+        (tmp_path / path).write_text("")
+    assert sorted(walk_reference_files(str(tmp_path))) == ["top.fits"]
+    assert sorted(walk_reference_files(str(tmp_path), recursive=True)) == \
+        ["d.fits/inner.fits", "d.fits/sub/x.json", "top.fits"]
+
+def test_unexpected_errors_become_file_errors(tmp_path, monkeypatch):
+    def broken_checks(*args):
+        raise AttributeError("'int' object has no attribute 'lower'")
+    monkeypatch.setattr(files, "run_checks", broken_checks)
+    result = check_file(str(tmp_path), "broken.fits")
+    assert result.status == "invalid"
+    assert result.errors == ["ERROR: Could not check broken.fits: "
+        "AttributeError(\"'int' object has no attribute 'lower'\")"]
+
+def test_unreadable_file(tmp_path):
+    (tmp_path / "empty.json").write_text("")
+    result = check_file(str(tmp_path), "empty.json")
+    assert result.status == "unreadable"
+    assert result.errors == ["NOT A VALID FILE"]
@@ -0,0 +1,63 @@
+"""
+Tests for the FITS header reader that does not need astropy
+"""
+import pytest
+
+from info_ref_files.readers import parse_fits_card_value, read_fits_header_cards
+
+@pytest.mark.parametrize("value_field, expected", [
+    ("'NIRCAM  '           / instrument", "NIRCAM"),
+    ("'O''HARA '", "O'HARA"),
+    ("'a / b'              / slash in a string", "a / b"),
+    ("'F070W|F090W'", "F070W|F090W"),
+    ("''", ""),
+    ("                   T", True),
+    ("                   F / comment", False),
+    ("                  42 / comment", 42),
+    ("                 -7", -7),
+    ("              1.5D+02", 150.0),
+    ("            -3.25E-1", -0.325),
+])
+def test_parse_fits_card_value(value_field, expected):
+    value = parse_fits_card_value(value_field)
+    assert value == expected
+    assert type(value) is type(expected)
+
+@pytest.fixture
+def fits_file(tmp_path):
+    fits = pytest.importorskip("astropy.io.fits")
+    header = fits.Header()
+    header["TELESCOP"] = "JWST"
+    header["INSTRUME"] = ("NIRCAM", "instrument")
+    header["REFTYPE"] = "FLAT"
+    header["FILTER"] = "F070W|F090W"
+    header["AUTHOR"] = "O'Hara"
+    header["SUBSTRT1"] = 1
+    header["EXPTIME"] = 10.75
+    header["FASTAXIS"] = True
+    header["SUBARRAY"] = False
+    header["DESCRIP"] = "A description long enough to be split over CONTINUE cards " * 3
+    header["HISTORY"] = "First history entry"
+    header["HISTORY"] = "Second history entry"
+    header["COMMENT"] = "A comment"
+    path = tmp_path / "header.fits"
+    fits.PrimaryHDU(header=header).writeto(str(path))
+    return (fits, str(path))
+
+def test_read_fits_header_cards_matches_astropy(fits_file):
+    (fits, path) = fits_file
+    header = fits.getheader(path, 0)
+    file_header = read_fits_header_cards(path)
+    for keyword in ["TELESCOP", "INSTRUME", "REFTYPE", "FILTER", "AUTHOR", "SUBSTRT1",
+        "EXPTIME", "FASTAXIS", "SUBARRAY", "DESCRIP"]:
+        assert file_header[keyword] == header[keyword]
+        assert type(file_header[keyword]) is type(header[keyword])
+    assert file_header["HISTORY"] == list(header["HISTORY"])
+    assert file_header["COMMENT"] == list(header["COMMENT"])
+    assert set(file_header) == set(header)
+
+def test_read_fits_header_cards_without_end(tmp_path):
+    path = tmp_path / "truncated.fits"
+    path.write_bytes(b"SIMPLE  =                    T".ljust(80) * 36)
+    with pytest.raises(ValueError):
+        read_fits_header_cards(str(path))
@@ -0,0 +1,119 @@
+"""
+Tests for compiling required_or.csv into OrRules and checking headers
+against them
+"""
+import pytest
+
+from info_ref_files.rules import (OrRule, parse_or_row_name, get_rule_locations,
+    set_rule_locations, load_required_or_rules, get_required_or_rules)
+from info_ref_files.results import FileResult
+from info_ref_files.checks import get_required_ors
+
+OR_ROWS = [
+    "nircam_flat FILTER READPATT",
+    "nircam_dark EXP_TYPE=NRC_DARK=READPATT=RAPID|BRIGHT1 SUBARRAY",
+    "jwst_miri_flat DETECTOR=MIRIMAGE=FILTER=F070W|N/A=! SUBARRAY",
+    "miri_flat BAND",
+]
+
+@pytest.fixture
+def or_rules(tmp_path):
+    """
+    Points the checkers at a required_or.csv holding OR_ROWS, restoring the
+    previous rule locations afterwards
+    """
+    previous = get_rule_locations()
+    or_file = tmp_path / "required_or.csv"
+    or_file.write_text("\n".join(OR_ROWS) + "\n")
+    set_rule_locations((previous[0], previous[1], str(or_file)))
+    yield load_required_or_rules()
+    set_rule_locations(previous)
+
+def check_ors(instrume, reftype, header):
+    result = FileResult("test.fits", "fits")
+    get_required_ors(instrume, reftype, "test.fits", header, "FITS", result)
+    return result
+
+def test_plain_element():
+    or_rule = OrRule("FILTER")
+    assert or_rule.keyword == "FILTER"
+    assert or_rule.value is None and or_rule.target is None and or_rule.allowed is None
+    assert not or_rule.negated
+
+def test_positive_element():
+    or_rule = OrRule("EXP_TYPE=NRC_DARK=READPATT=RAPID|BRIGHT1")
+    assert (or_rule.keyword, or_rule.value, or_rule.target) == ("EXP_TYPE", "NRC_DARK", "READPATT")
+    assert or_rule.allowed == frozenset(["RAPID", "BRIGHT1"])
+    assert not or_rule.negated
+
+def test_negated_element():
+    or_rule = OrRule("DETECTOR=MIRIMAGE=FILTER=F070W|N/A=!")
+    assert (or_rule.keyword, or_rule.value, or_rule.target) == ("DETECTOR", "MIRIMAGE", "FILTER")
+    assert or_rule.allowed == frozenset(["F070W", "N/A"])
+    assert or_rule.negated
+
+@pytest.mark.parametrize("element", ["A=b", "A=b=C", "A=b=C=d=x", "A=b=C=d=!=e"])
+def test_invalid_elements(element):
+    with pytest.raises(ValueError):
+        OrRule(element)
+
+@pytest.mark.parametrize("name, expected", [
+    ("nircam_flat", ("nircam", "flat")),
+    ("jwst_nircam_flat", ("nircam", "flat")),
+    ("NIRCam_FLAT", ("nircam", "flat")),
+    ("miri_dark_current", ("miri", "dark_current")),
+])
+def test_parse_or_row_name(name, expected):
+    assert parse_or_row_name(name) == expected
+
+def test_rows_are_indexed_by_instrument_and_reftype(or_rules):
+    assert [or_rule.keyword for or_rule in or_rules[("nircam", "flat")]] == ["FILTER", "READPATT"]
+    #Rows for the same instrument and reftype are joined
+    assert [or_rule.keyword for or_rule in or_rules[("miri", "flat")]] == ["DETECTOR", "SUBARRAY", "BAND"]
+    assert or_rules[("nircam", "dark")][0].allowed == frozenset(["RAPID", "BRIGHT1"])
+
+def test_reftype_must_match_exactly(or_rules):
+    assert get_required_or_rules("NIRCAM", "FLAT") is not None
+    assert get_required_or_rules("NIRCAM", "DARKCURRENT") is None
+    assert get_required_or_rules("NIRCAM", "LAT") is None
+    #Header values that are not strings never match a row
+    assert get_required_or_rules("NIRCAM", 7) is None
+
+def test_plain_rules(or_rules):
+    result = check_ors("NIRCAM", "FLAT", {"FILTER": "F070W|F090W", "READPATT": "N/A"})
+    assert result.or_violations == []
+    result = check_ors("NIRCAM", "FLAT", {"FILTER": "F070W", "READPATT": "RAPID"})
+    assert result.or_violations == ["FILTER", "READPATT"]
+
+def test_plain_rule_missing_keyword_warns(or_rules):
+    result = check_ors("NIRCAM", "FLAT", {"FILTER": "F070W|F090W"})
+    assert result.or_violations == []
+    assert result.warnings == ["WARNING: READPATT not in test.fits's header"]
+
+def test_positive_rule(or_rules):
+    #EXP_TYPE is NRC_DARK, so every READPATT alternative must be allowed
+    result = check_ors("NIRCAM", "DARK", {"EXP_TYPE": "NRC_DARK", "READPATT": "RAPID|BRIGHT1", "SUBARRAY": "N/A"})
+    assert result.or_violations == []
+    result = check_ors("NIRCAM", "DARK", {"EXP_TYPE": "NRC_DARK", "READPATT": "RAPID|SHALLOW2", "SUBARRAY": "N/A"})
+    assert result.or_violations == ["READPATT"]
+    #Otherwise EXP_TYPE itself needs alternatives
+    result = check_ors("NIRCAM", "DARK", {"EXP_TYPE": "NRC_DARK|NRC_FLAT", "READPATT": "SHALLOW2", "SUBARRAY": "N/A"})
+    assert result.or_violations == []
+    result = check_ors("NIRCAM", "DARK", {"EXP_TYPE": "NRC_FLAT", "READPATT": "SHALLOW2", "SUBARRAY": "N/A"})
+    assert result.or_violations == ["EXP_TYPE"]
+
+def test_negated_rule(or_rules):
+    header = {"SUBARRAY": "N/A", "BAND": "N/A"}
+    #DETECTOR is not MIRIMAGE, so every FILTER alternative must be allowed
+    result = check_ors("MIRI", "FLAT", dict(header, DETECTOR="MIRIFULONG", FILTER="F070W|N/A"))
+    assert result.or_violations == []
+    result = check_ors("MIRI", "FLAT", dict(header, DETECTOR="MIRIFULONG", FILTER="F070W|F560W"))
+    assert result.or_violations == ["FILTER"]
+    #DETECTOR is MIRIMAGE, so DETECTOR is checked as a plain element
+    result = check_ors("MIRI", "FLAT", dict(header, DETECTOR="MIRIMAGE", FILTER="F560W"))
+    assert result.or_violations == ["DETECTOR"]
+
+def test_violations_are_reported_once(or_rules):
+    result = check_ors("MIRI", "FLAT", {"DETECTOR": "MIRIMAGE", "FILTER": "F560W", "SUBARRAY": "FULL", "BAND": "SHORT"})
+    assert result.or_violations == ["DETECTOR", "SUBARRAY", "BAND"]
+    assert len(result.messages) == 1
@@ -0,0 +1,57 @@
+"""
+Tests for compiling the required_keywords csv files and checking headers
+against them
+"""
+import pytest
+
+from info_ref_files.rules import (get_rule_locations, set_rule_locations, parse_required_keys_row_name,
+    get_required_key_set)
+from info_ref_files.results import FileResult
+from info_ref_files.checks import check_required_keys
+
+NIRCAM_ROWS = [
+    "jwst_nircam_flat DETECTOR FILTER REFTYPE",
+    "jwst_nircam_dark DETECTOR READPATT",
+    "nircam_dark_current DETECTOR",
+    "jwst_nircam_flat IGNORED",
+]
+
+@pytest.fixture
+def required_keys(tmp_path):
+    """
+    Points the checkers at a NIRCam_required_keywords.csv holding NIRCAM_ROWS,
+    restoring the previous rule locations afterwards
+    """
+    previous = get_rule_locations()
+    (tmp_path / "NIRCam_required_keywords.csv").write_text("\n".join(NIRCAM_ROWS) + "\n")
+    set_rule_locations((str(tmp_path) + "/", previous[1], previous[2]))
+    yield
+    set_rule_locations(previous)
+
+@pytest.mark.parametrize("name, expected", [
+    ("jwst_nircam_flat", ("jwst", "flat")),
+    ("NIRCam_FLAT", ("", "flat")),
+    ("jwst_nircam_dark_current", ("jwst", "dark_current")),
+    ("jwst_miri_flat", None),
+])
+def test_parse_required_keys_row_name(name, expected):
+    assert parse_required_keys_row_name(name, "NIRCam") == expected
+
+def test_reftype_must_match_exactly(required_keys):
+    (keys, key_order, telescop_matched) = get_required_key_set("NIRCAM", "FLAT", "JWST")
+    assert keys == frozenset(["DETECTOR", "FILTER", "REFTYPE"])
+    assert key_order == ("DETECTOR", "FILTER", "REFTYPE")
+    assert telescop_matched
+    assert get_required_key_set("NIRCAM", "DARK", False)[0] == frozenset(["DETECTOR", "READPATT"])
+    assert get_required_key_set("NIRCAM", "DARK_CURRENT", "JWST")[1:] == (("DETECTOR",), False)
+    assert get_required_key_set("NIRCAM", "LAT", "JWST") is None
+
+@pytest.mark.parametrize("reftype", ["FLAT(", "[", 7])
+def test_header_values_are_not_patterns(required_keys, reftype):
+    assert get_required_key_set("NIRCAM", reftype, "JWST") is None
+
+def test_missing_keys_are_reported_in_csv_order(required_keys):
+    result = FileResult("test.fits", "fits")
+    check_required_keys("NIRCAM", "test.fits", {"INSTRUME": "NIRCAM", "REFTYPE": "FLAT", "TELESCOP": "JWST"}, result)
+    assert result.missing_keys == ["DETECTOR", "FILTER"]
+    assert result.messages == ["Missing keywords in test.fits: ['DETECTOR', 'FILTER']"]